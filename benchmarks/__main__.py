@@ -0,0 +1,268 @@
+"""
+Times the simulation's hot paths with fixed seeds and records the results as JSON, for comparing across commits
+
+    python -m benchmarks --output before.json
+    python -m benchmarks --output after.json --only year-x1 run
+    python -m benchmarks --compare before.json after.json
+
+Every benchmark runs in its own interpreter, so that each starts from a clean heap and reports its own peak RSS.
+Each benchmark is timed --repeat times, then run once more under tracemalloc to measure its allocations, since tracing
+slows everything down too much to time at the same time.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from random import Random
+from typing import Callable, Dict
+
+from benchmarks.memory import peak_rss_mb
+
+# a benchmark's setup, which isn't measured, returns the function that is
+Setup = Callable[[argparse.Namespace], Callable[[], object]]
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+# years simulated before timing a single year, so there are ships in flight and colonies to process, and pops have
+# descendents to regroup
+WARMUP_YEARS = 5
+
+# pops in the single settlement of the births benchmark, enough for regrouping and merging costs to show
+BIRTHS_POPS = 10_000
+
+# a benchmark is reported as a regression when it gets this much slower or bigger
+REGRESSION_THRESHOLD = 0.1
+
+
+def benchmark(name: str):
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("catalogue")
+def catalogue(args: argparse.Namespace):
+    from destiny.cartography.mapping import load_stellar_catalogue
+
+    return load_stellar_catalogue
+
+
+@benchmark("neighbours")
+def neighbours(args: argparse.Namespace):
+    from destiny.cartography.mapping import index_neighbours, load_stellar_catalogue
+
+    habitable_stars = [s for s in load_stellar_catalogue() if s.habitable]
+    return lambda: index_neighbours(habitable_stars)
+
+
+@benchmark("earth-pops")
+def earth_pops(args: argparse.Namespace):
+    from destiny.cartography.mapping import generate_sol
+    from destiny.sociology.utils.loading import generate_earth_pops
+
+    earth = generate_sol().planets[2]
+    return lambda: generate_earth_pops(Random(args.seed), earth=earth)
+
+
+@benchmark("births")
+def births(args: argparse.Namespace):
+    from benchmarks.population import generate_pops
+    from destiny.sociology.utils.life import process_births_and_deaths
+
+    rng = Random(args.seed)
+    pops = generate_pops(rng, BIRTHS_POPS)
+    for _ in range(WARMUP_YEARS):
+        pops = process_births_and_deaths(pops, rng)
+    # processing ages and extends the pops it's given, so each timed call takes its own freshly built settlement, and a
+    # second call fails rather than timing a settlement that's a year older
+    settlements = [pops]
+    return lambda: process_births_and_deaths(settlements.pop(), rng)
+
+
+def year_at_scale(scale: float) -> Setup:
+    def setup(args: argparse.Namespace):
+        from destiny.simulation import Simulation
+        from destiny.sociology.constants import EARTH_POPULATION_MULTIPLIER
+
+        simulation = Simulation(args.seed, population_multiplier=EARTH_POPULATION_MULTIPLIER * scale)
+        simulation.run(WARMUP_YEARS)
+        return simulation.process_year
+
+    return setup
+
+
+for year_scale in (0.25, 1, 4):
+    benchmark(f"year-x{year_scale:g}")(year_at_scale(year_scale))
+
+
+@benchmark("run")
+def full_run(args: argparse.Namespace):
+    from destiny.cartography.mapping import load_stellar_catalogue
+    from destiny.simulation import Simulation
+
+    starmap = load_stellar_catalogue()
+    return lambda: Simulation(args.seed, starmap=starmap).run(args.years)
+
+
+@benchmark("serialise")
+def serialise(args: argparse.Namespace):
+    from destiny.serialisation import Starmap
+    from destiny.simulation import Simulation
+
+    simulation = Simulation(args.seed)
+    simulation.run(args.years)
+    return lambda: Starmap.write_json(io.StringIO(), simulation.starmap, simulation.transits)
+
+
+def measure(args: argparse.Namespace) -> dict:
+    """
+    Runs a single benchmark in this process. Setup is repeated before each run, since most benchmarks change the state
+    they run on.
+    """
+    setup = BENCHMARKS[args.run]
+    seconds = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(args.repeat):
+            function = setup(args)
+            start = time.perf_counter()
+            function()
+            seconds.append(time.perf_counter() - start)
+
+        function = setup(args)
+        tracemalloc.start()
+        function()
+        traced_net, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "seconds_min": min(seconds),
+        "seconds_median": statistics.median(seconds),
+        "traced_peak_bytes": traced_peak,
+        "traced_net_bytes": traced_net,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(name: str, args: argparse.Namespace) -> dict:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks",
+        "--run",
+        name,
+        "--seed",
+        str(args.seed),
+        "--years",
+        str(args.years),
+        "--repeat",
+        str(args.repeat),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exited with {completed.returncode}"}
+    return json.loads(completed.stdout)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(args: argparse.Namespace):
+    names = args.only or list(BENCHMARKS)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "years": args.years,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for name in names:
+        result = run_isolated(name, args)
+        report["results"][name] = result
+        if "error" in result:
+            print(f"{name:>12}: failed, {result['error']}")
+        else:
+            print(
+                f"{name:>12}: {result['seconds_min']:9.3f}s, "
+                f"{result['traced_peak_bytes'] / (1024 * 1024):9.1f}MB traced peak, "
+                f"{result['peak_rss_mb']:9.1f}MB peak RSS"
+            )
+
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Written results to {args.output}")
+
+
+def compare(before_path: str, after_path: str, threshold: float) -> bool:
+    """
+    Prints how each benchmark changed between two result files
+
+    :returns whether any benchmark regressed by more than threshold
+    """
+    with open(before_path) as before_file:
+        before = json.load(before_file)
+    with open(after_path) as after_file:
+        after = json.load(after_file)
+
+    print(f"{before['commit'][:10]} -> {after['commit'][:10]}")
+    regressed = False
+    metrics = ("seconds_min", "traced_peak_bytes", "peak_rss_mb")
+    for name, result in after["results"].items():
+        previous = before["results"].get(name)
+        if previous is None or "error" in previous or "error" in result:
+            status = result.get("error", "ok") if previous else "new"
+            print(f"{name:>12}: {status}")
+            continue
+        changes = []
+        for metric in metrics:
+            change = result[metric] / previous[metric] - 1 if previous[metric] else 0
+            flag = ""
+            if change > threshold:
+                flag = " REGRESSION"
+                regressed = True
+            changes.append(f"{metric} {change:+7.1%}{flag}")
+        print(f"{name:>12}: " + ", ".join(changes))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--years", type=int, default=50, help="years simulated by the run and serialise benchmarks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None)
+    parser.add_argument("--output", default="benchmarks.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), default=None)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--run", choices=list(BENCHMARKS), default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    elif args.run:
+        print(json.dumps(measure(args)))
+    else:
+        run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Reports the memory used by pops and by a full simulation run
+
+    python -m benchmarks.memory --pops 100000
+    python -m benchmarks.memory --years 250
+"""
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+from random import Random
+
+from benchmarks.population import generate_pops
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_pops(num_pops: int, seed: int):
+    tracemalloc.start()
+    pops = generate_pops(Random(seed), num_pops)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{len(pops):,} pops: {current / len(pops):,.0f} bytes/pop, "
+        f"{current / (1024 * 1024):,.1f}MB traced, {peak / (1024 * 1024):,.1f}MB traced peak"
+    )
+
+
+def measure_simulation(years: int):
+    from destiny.simulation import simulate
+
+    start = time.perf_counter()
+    simulate(years)
+    elapsed = time.perf_counter() - start
+    print(f"{years} year run: {elapsed:,.1f}s, {peak_rss_mb():,.1f}MB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pops", type=int, default=None)
+    parser.add_argument("--years", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.pops is None and args.years is None:
+        args.pops = 100_000
+    if args.pops is not None:
+        measure_pops(args.pops, args.seed)
+    if args.years is not None:
+        measure_simulation(args.years)
+    print(f"Peak RSS: {peak_rss_mb():,.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the per-object births and deaths path with the array-backed PopulationStore
+
+    python -m benchmarks.population --pops 50000 --years 10
+"""
+import argparse
+import copy
+import time
+from random import Random
+from typing import List
+
+from destiny.sociology.constants import POP_TARGET_SIZE
+from destiny.sociology.pop import Population
+from destiny.sociology.utils.cohorts import Cohorts
+from destiny.sociology.utils.population_store import PopulationStore
+
+
+def generate_pops(rng: Random, num_pops: int) -> List[Population]:
+    pops = []
+    for n in range(num_pops):
+        band = n / num_pops
+        pop = Population(rng, POP_TARGET_SIZE, [("Benchmark", 100)], randomise_statistics=True)
+        if band < 0.242:
+            pop.average_age = rng.randint(20, 24)
+        elif band < 0.885:
+            pop.average_age = rng.randint(25, 65)
+        else:
+            pop.average_age = rng.randint(66, 90)
+        pop.children = Cohorts(
+            rng.randint(int(50 / 10_000 * POP_TARGET_SIZE), int(300 / 10_000 * POP_TARGET_SIZE))
+            for _ in range(20)
+        )
+        pops.append(pop)
+    return pops
+
+
+def run_objects(pops: List[Population], rng: Random, years: int):
+    for _ in range(years):
+        for pop in pops:
+            pop.births_and_deaths(rng.randint(10, 80), rng.randint(1, 10))
+
+
+def run_store(pops: List[Population], rng: Random, years: int, statistical: bool):
+    for _ in range(years):
+        store = PopulationStore(pops)
+        store.births_and_deaths(rng, statistical=statistical)
+        store.write_back()
+
+
+def run_resident_store(pops: List[Population], rng: Random, years: int):
+    store = PopulationStore(pops)
+    for _ in range(years):
+        store.births_and_deaths(rng)
+    store.write_back()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pops", type=int, default=50_000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    template = generate_pops(Random(args.seed), args.pops)
+    runs = {
+        "objects": lambda pops, rng: run_objects(pops, rng, args.years),
+        "store (replayed draws)": lambda pops, rng: run_store(pops, rng, args.years, False),
+        "store (statistical)": lambda pops, rng: run_store(pops, rng, args.years, True),
+        "resident store": lambda pops, rng: run_resident_store(pops, rng, args.years),
+    }
+
+    print(f"{args.pops:,} pops, {args.years} years")
+    for name, run in runs.items():
+        pops = copy.deepcopy(template)
+        rng = Random(args.seed)
+        for pop in pops:
+            pop.rng = rng
+        start = time.perf_counter()
+        run(pops, rng)
+        elapsed = time.perf_counter() - start
+        population = sum(p.population for p in pops)
+        children = sum(p.children.total() for p in pops)
+        print(
+            f"{name:>24}: {elapsed / args.years * 1000:8.1f}ms/year, "
+            f"{population:,} adults, {children:,} children"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+CATALOGUE_SOURCES = (
+    "data/bsc5p_3d.json",
+    "data/bsc5p_names.json",
+    "data/bsc5p_spectral_extra.json",
+)
+CACHE_DIRECTORY = "data/cache"
+CATALOGUE_CACHE = os.path.join(CACHE_DIRECTORY, "bsc5p.npz")
+
+# bump whenever compile_catalogue changes what it stores
+CATALOGUE_VERSION = 1
+
+SPECTRAL_CLASSES = ("O", "B", "A", "F", "G", "K", "M")
+
+
+def hash_files(*paths: str) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def catalogue_key() -> str:
+    return f"{CATALOGUE_VERSION}:{hash_files(*CATALOGUE_SOURCES)}"
+
+
+def compile_catalogue() -> Dict[str, np.ndarray]:
+    """
+    Parses the BSC5P json files into columns, keeping only the stars that can be simulated
+
+    :returns a dict of equal length arrays: name, position, spectral_class, spectral_subclass, colour and luminosity
+    """
+    catalogue_3d_path, catalogue_name_path, catalogue_spectral_path = CATALOGUE_SOURCES
+    with open(catalogue_3d_path) as catalogue_3d_file:
+        catalogue_3d = json.load(catalogue_3d_file)
+    with open(catalogue_name_path) as catalogue_name_file:
+        catalogue_name_unsorted = json.load(catalogue_name_file)
+    with open(catalogue_spectral_path) as catalogue_spectral_file:
+        catalogue_spectral_unsorted = json.load(catalogue_spectral_file)
+
+    catalogue_name = {d["i"]: d for d in catalogue_name_unsorted}
+    catalogue_spectral = {d["i"]: d for d in catalogue_spectral_unsorted}
+
+    names = []
+    positions = []
+    spectral_classes = []
+    spectral_subclasses = []
+    colours = []
+    luminosities = []
+    for data in catalogue_3d:
+        star_id = data["i"]
+        spectral_data = catalogue_spectral[star_id]
+
+        spectral_class = spectral_data["C"]
+        if "/" in spectral_class:
+            spectral_class = spectral_class.split("/")[-1]
+
+        if spectral_class not in SPECTRAL_CLASSES:
+            continue
+
+        spectral_subclass = spectral_data.get("S")
+        if not spectral_subclass:
+            spectral_subclass = "5"
+        if "/" in spectral_subclass:
+            spectral_subclass = spectral_subclass.split("/")[0]
+        if "-" in spectral_subclass:
+            spectral_subclass = spectral_subclass.split("-")[0]
+
+        try:
+            float(spectral_subclass)
+        except ValueError:
+            continue
+
+        maybe_names = [
+            n[5:] for n in catalogue_name[star_id]["n"] if n.startswith("NAME ")
+        ]
+        if maybe_names:
+            name = min(maybe_names, key=lambda n: len(n))
+        else:
+            name = data["n"]
+        colour = data.get("K", {"r": 1, "g": 1, "b": 1})
+
+        names.append(name)
+        positions.append((data["x"], data["y"], data["z"]))
+        spectral_classes.append(spectral_class)
+        spectral_subclasses.append(spectral_subclass)
+        colours.append((colour["r"], colour["g"], colour["b"]))
+        luminosities.append(data["N"])
+
+    return {
+        "name": np.array(names, dtype=str),
+        "position": np.array(positions, dtype=np.float64).reshape(-1, 3),
+        "spectral_class": np.array(spectral_classes, dtype=str),
+        "spectral_subclass": np.array(spectral_subclasses, dtype=str),
+        "colour": np.array(colours, dtype=np.float64).reshape(-1, 3),
+        "luminosity": np.array(luminosities, dtype=np.float64),
+    }
+
+
+def load_catalogue() -> Dict[str, np.ndarray]:
+    """
+    Loads the compiled catalogue, recompiling it if the source files have changed since it was cached
+    """
+    key = catalogue_key()
+    if os.path.exists(CATALOGUE_CACHE):
+        with np.load(CATALOGUE_CACHE, allow_pickle=False) as cached:
+            if str(cached["key"]) == key:
+                return {name: cached[name] for name in cached.files if name != "key"}
+
+    catalogue = compile_catalogue()
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    partial_path = f"{CATALOGUE_CACHE}.{os.getpid()}.tmp"
+    with open(partial_path, "wb") as cache_file:
+        np.savez(cache_file, key=np.array(key), **catalogue)
+    os.replace(partial_path, CATALOGUE_CACHE)
+    return catalogue
+
+
+def iterate_catalogue(
+    catalogue: Dict[str, np.ndarray]
+) -> Iterator[Tuple[str, Tuple[float, float, float], str, str, Dict[str, float], float]]:
+    for name, position, spectral_class, spectral_subclass, colour, luminosity in zip(
+        catalogue["name"].tolist(),
+        catalogue["position"].tolist(),
+        catalogue["spectral_class"].tolist(),
+        catalogue["spectral_subclass"].tolist(),
+        catalogue["colour"].tolist(),
+        catalogue["luminosity"].tolist(),
+    ):
+        r, g, b = colour
+        yield name, position, spectral_class, spectral_subclass, {
+            "r": r,
+            "g": g,
+            "b": b,
+        }, luminosity
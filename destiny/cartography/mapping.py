@@ -1,8 +1,10 @@
-import json
 from typing import List, Dict, Tuple, Iterable
 
+from destiny.cartography.catalogue import load_catalogue, iterate_catalogue
 from destiny.cartography.planet import Planet, LifeLevel
+from destiny.cartography.spatial import StarIndex
 from destiny.cartography.star import Star
+from destiny.cartography.systems import SystemCache
 from destiny.maths import Vec3
 
 import numpy as np
@@ -27,99 +29,81 @@ def generate_sol():
 def load_stellar_catalogue() -> List[Star]:
     stars = [generate_sol()]
 
-    with open("data/bsc5p_3d.json") as catalogue_3d_file:
-        catalogue_3d = json.load(catalogue_3d_file)
-    with open("data/bsc5p_names.json") as catalogue_name_file:
-        catalogue_name_unsorted = json.load(catalogue_name_file)
-    with open("data/bsc5p_spectral_extra.json") as catalogue_spectral_file:
-        catalogue_spectral_unsorted = json.load(catalogue_spectral_file)
-
-    catalogue_name = {d["i"]: d for d in catalogue_name_unsorted}
-    catalogue_spectral = {d["i"]: d for d in catalogue_spectral_unsorted}
+    catalogue = load_catalogue()
+    systems = SystemCache()
 
     print("Loading stellar data")
-    for data in catalogue_3d:
-        star_id = data["i"]
-        pos = Vec3(data["x"], data["y"], data["z"])
-        colour = data.get("K", {"r": 1, "g": 1, "b": 1})
-
-        maybe_names = [
-            n[5:] for n in catalogue_name[star_id]["n"] if n.startswith("NAME ")
-        ]
-        if maybe_names:
-            name = min(maybe_names, key=lambda n: len(n))
-        else:
-            name = data["n"]
-        luminosity = data["N"]
-        spectral_data = catalogue_spectral[star_id]
-
-        spectral_class = spectral_data["C"]
-        if "/" in spectral_class:
-            spectral_class = spectral_class.split("/")[-1]
-
-        if spectral_class not in ("O", "B", "A", "F", "G", "K", "M"):
-            continue
+    for (
+        name,
+        (x, y, z),
+        spectral_class,
+        spectral_subclass,
+        colour,
+        luminosity,
+    ) in iterate_catalogue(catalogue):
+        star = Star(
+            name,
+            Vec3(x, y, z),
+            spectral_class,
+            spectral_subclass,
+            colour,
+            luminosity,
+            systems=systems,
+        )
+        stars.append(star)
+    systems.save()
 
-        spectral_subclass = spectral_data.get("S")
-        if not spectral_subclass:
-            spectral_subclass = "5"
-        if "/" in spectral_subclass:
-            spectral_subclass = spectral_subclass.split("/")[0]
-        if "-" in spectral_subclass:
-            spectral_subclass = spectral_subclass.split("-")[0]
-
-        try:
-            subclass = float(spectral_subclass)
-        except ValueError:
-            continue
+    index_neighbours([s for s in stars if s.habitable])
 
-        star = Star(name, pos, spectral_class, spectral_subclass, colour, luminosity)
-        stars.append(star)
+    return stars
 
-    habitable_stars = [s for s in stars if s.habitable]
 
+def index_neighbours(habitable_stars: List[Star]):
+    """
+    Builds the neighbour graph and spatial index that ships navigate the habitable stars by
+    """
     print(f"Calculating neighbours for {len(habitable_stars)} habitable stars")
     points_for_scipy = np.array([s.position.to_list() for s in habitable_stars])
     tris = Delaunay(points_for_scipy, qhull_options="Qbb Qc Qz Q12 QJ")
 
-    star_distance_cache = {}
-
     print(f"Precomputing distances between {len(habitable_stars)} habitable stars")
-    for n, star in enumerate(habitable_stars):
-        neighbour_indexes = find_delaunay_neighbors(n, tris)
-        for index in neighbour_indexes:
-            if index == len(habitable_stars):
-                continue  # where index 1094 is coming from, I don't know
-            key = frozenset((n, index))
-            other = habitable_stars[index]
-            if key in star_distance_cache:
-                distance = star_distance_cache[key]
-            else:
-                distance = other.position.distance(star.position)
-                star_distance_cache[key] = distance
-
-            star.precomputed_neighbours.append((other, distance))
-        star.precomputed_neighbours = sorted(star.precomputed_neighbours, key=lambda t: t[1])
-
-    # for star in habitable_stars:
-    #     star.precomputed_neighbours = compute_neighbours(
-    #         star_distance_cache, habitable_stars, star
-    #     )
+    precompute_neighbours(habitable_stars, tris)
+
+    print(f"Indexing positions of {len(habitable_stars)} habitable stars")
+    spatial_index = StarIndex(habitable_stars)
+    for star in habitable_stars:
+        star.spatial_index = spatial_index
+
+
+def find_delaunay_neighbours(triangulation: Delaunay) -> List[np.ndarray]:
+    """
+    Builds the vertex adjacency of a triangulation from every edge of every simplex
+
+    :param triangulation: the Delaunay triangulation of the habitable stars
+    :returns the indexes of every vertex's neighbours, indexed by vertex
+    """
+    num_points = len(triangulation.points)
+    simplices = triangulation.simplices
+    vertices = simplices.shape[1]
+    starts = np.concatenate(
+        [simplices[:, i] for i in range(vertices) for j in range(vertices) if i != j]
+    )
+    ends = np.concatenate(
+        [simplices[:, j] for i in range(vertices) for j in range(vertices) if i != j]
+    )
+    # joggled triangulations can reference a vertex past the input points
+    valid = (starts < num_points) & (ends < num_points)
+    edges = np.unique(np.stack([starts[valid], ends[valid]], axis=1), axis=0)
+    boundaries = np.searchsorted(edges[:, 0], np.arange(num_points + 1))
+    return [
+        edges[boundaries[n] : boundaries[n + 1], 1] for n in range(num_points)
+    ]
 
-    return stars
 
+def precompute_neighbours(stars: List[Star], triangulation: Delaunay):
+    for star, neighbour_indexes in zip(stars, find_delaunay_neighbours(triangulation)):
+        store_neighbours(star, stars, neighbour_indexes.tolist())
 
-def find_delaunay_neighbors(pindex, triang):
-    neighbors = list()
-    for simplex in triang.simplices:
-        if pindex in simplex:
-            neighbors.extend([simplex[i] for i in range(len(simplex)) if simplex[i] != pindex])
-            '''
-            this is a one liner for if a simplex contains the point we`re interested in,
-            extend the neighbors list by appending all the *other* point indices in the simplex
-            '''
-    #now we just have to strip out all the dulicate indices and return the neighbors list:
-    return list(set(neighbors))
 
 def store_neighbours(star: Star, stars: List[Star], neighbour_indexes: Iterable[int]):
     neighbours = []
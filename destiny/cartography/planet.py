@@ -4,8 +4,6 @@ from random import Random
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID, uuid4
 
-from destiny.maths import Vec3
-
 if TYPE_CHECKING:
     from destiny.cartography.star import Star
     from destiny.sociology.inhabitedplanet import InhabitedPlanet
@@ -49,21 +47,50 @@ LIFE_LEVEL_NAMES = [
 
 
 class Planet:
+    __slots__ = (
+        "star",
+        "uuid",
+        "_mass",
+        "_day_length_hours",
+        "_orbital_radius",
+        "solid",
+        "surface_water",
+        "_greenhouse_factor",
+        "moons",
+        "native_life",
+        "life_level",
+        "inhabited",
+        "ships",
+        "radius",
+        "gravity",
+        "orbital_period",
+        "unmodified_surface_temp",
+        "surface_temperature",
+        "habitable",
+    )
+
     star: "Star"
     uuid: UUID
-    mass: float
-    day_length_hours: float
-    orbital_radius: float
+    _mass: float
+    _day_length_hours: float
+    _orbital_radius: float
     solid: bool
     surface_water: Optional[float]
-    greenhouse_factor: int
+    _greenhouse_factor: int
     moons: int
-    position: Vec3
     native_life: Optional[LifeType]
     life_level: LifeLevel
     inhabited: Optional["InhabitedPlanet"]
     ships: List["Starship"]
 
+    # derived from the physical parameters above, kept up to date by their setters
+    radius: float
+    gravity: float
+    orbital_period: float
+    unmodified_surface_temp: int
+    surface_temperature: int
+    habitable: bool
+
     def __init__(
         self,
         star: "Star",
@@ -77,17 +104,99 @@ class Planet:
     ):
         self.uuid = uuid4()
         self.star = star
-        self.mass = mass
-        self.day_length_hours = day_length
-        self.orbital_radius = orbital_radius
+        self._mass = mass
+        self._day_length_hours = day_length
+        self._orbital_radius = orbital_radius
         self.solid = solid
         self.surface_water = surface_water
-        self.greenhouse_factor = greenhouse_factor if solid else 0
+        self._greenhouse_factor = greenhouse_factor if solid else 0
         self.moons = moons
         self.native_life = None
         self.life_level = LifeLevel.none
         self.inhabited = None
         self.ships = []
+        self._update_physics()
+
+    @property
+    def mass(self) -> float:
+        return self._mass
+
+    @mass.setter
+    def mass(self, mass: float):
+        self._mass = mass
+        self._physics_changed()
+
+    @property
+    def day_length_hours(self) -> float:
+        return self._day_length_hours
+
+    @day_length_hours.setter
+    def day_length_hours(self, day_length_hours: float):
+        self._day_length_hours = day_length_hours
+        self._physics_changed()
+
+    @property
+    def orbital_radius(self) -> float:
+        return self._orbital_radius
+
+    @orbital_radius.setter
+    def orbital_radius(self, orbital_radius: float):
+        self._orbital_radius = orbital_radius
+        self._physics_changed()
+
+    @property
+    def greenhouse_factor(self) -> int:
+        return self._greenhouse_factor
+
+    @greenhouse_factor.setter
+    def greenhouse_factor(self, greenhouse_factor: int):
+        self._greenhouse_factor = greenhouse_factor if self.solid else 0
+        self._physics_changed()
+
+    def _physics_changed(self):
+        self._update_physics()
+        self.star.invalidate_habitable_planets()
+
+    def _update_physics(self):
+        """
+        Recomputes every derived physical property from mass, orbit, day length and greenhouse factor
+        """
+        kg_mass = self._mass * 5.972 * (10**24)
+        volume = kg_mass / 5515
+        self.radius = math.pow((3 * volume) / (4 * math.pi), 1 / 3)
+
+        gravitational_constant = 6.6743 * (10**-11)
+        self.gravity = (kg_mass * gravitational_constant) / (self.radius**2) / 9.81
+
+        orbit_metres = self._orbital_radius * (149 * (10**9))
+        star_mass_kg = self.star.mass * (1.989 * (10**30))
+        period_seconds = (
+            2
+            * math.pi
+            * math.sqrt((orbit_metres**3) / (gravitational_constant * star_mass_kg))
+        )
+        self.orbital_period = period_seconds / (60 * 60)
+
+        bond_albedo = 0.3
+        boltzman_constant = 5.670373 * (10**-8)
+        denominator = 16 * math.pi * boltzman_constant * (orbit_metres**2)
+        luminosity_watts = 3.846 * (10**26)
+        received_power = self.star.luminosity * luminosity_watts * (1 - bond_albedo)
+        temperature_fourth = received_power / denominator
+        temperature = math.pow(temperature_fourth, 1 / 4)
+        self.unmodified_surface_temp = int(temperature - 273)  # kelvin - 273 = celsius
+        self.surface_temperature = self.unmodified_surface_temp + self._greenhouse_factor
+
+        if not self.solid:
+            self.habitable = False
+        else:
+            days_per_year = self.orbital_period / self._day_length_hours
+            self.habitable = (
+                days_per_year > 100
+                and 0.75 < self.gravity < 1.25
+                and 0 <= self.surface_temperature <= 25
+                and self._greenhouse_factor < 50
+            )
 
     def generate_life(self, rng: Random):
         options: List[Optional[LifeType]] = []
@@ -127,58 +236,6 @@ class Planet:
             raw_level = round((chance ** (10 if chance <= 0.9 else 30)) * 9 + 1)
             self.life_level = LifeLevel(raw_level)
 
-    @property
-    def habitable(self):
-        if not self.solid:
-            return False
-        days_per_year = self.orbital_period / self.day_length_hours
-        return (
-            days_per_year > 100
-            and 0.75 < self.gravity < 1.25
-            and 0 <= self.surface_temperature <= 25
-            and self.greenhouse_factor < 50
-        )
-
-    @property
-    def radius(self):
-        kg_mass = self.mass * 5.972 * (10**24)
-        volume = kg_mass / 5515
-        return math.pow((3 * volume) / (4 * math.pi), 1 / 3)
-
-    @property
-    def gravity(self):
-        kg_mass = self.mass * 5.972 * (10**24)
-        gravitational_constant = 6.6743 * (10**-11)
-        return (kg_mass * gravitational_constant) / (self.radius**2) / 9.81
-
-    @property
-    def orbital_period(self):
-        orbit_metres = self.orbital_radius * (149 * (10**9))
-        star_mass_kg = self.star.mass * (1.989 * (10**30))
-        gravitational_constant = 6.6743 * (10**-11)
-        period_seconds = (
-            2
-            * math.pi
-            * math.sqrt((orbit_metres**3) / (gravitational_constant * star_mass_kg))
-        )
-        return period_seconds / (60 * 60)
-
-    @property
-    def unmodified_surface_temp(self):
-        bond_albedo = 0.3
-        boltzman_constant = 5.670373 * (10**-8)
-        orbit_metres = self.orbital_radius * (149 * (10**9))
-        denominator = 16 * math.pi * boltzman_constant * (orbit_metres**2)
-        luminosity_watts = 3.846 * (10**26)
-        received_power = self.star.luminosity * luminosity_watts * (1 - bond_albedo)
-        temperature_fourth = received_power / denominator
-        temperature = math.pow(temperature_fourth, 1 / 4)
-        return int(temperature - 273)  # kelvin - 273 = celsius
-
-    @property
-    def surface_temperature(self):
-        return self.unmodified_surface_temp + self.greenhouse_factor
-
     def __repr__(self):
         type_ = "Rocky planet" if self.solid else "Gas giant"
         mass = f"{round(self.mass, 2)}M⊕"
@@ -0,0 +1,62 @@
+import math
+from bisect import bisect_right
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from uuid import UUID
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+if TYPE_CHECKING:
+    from destiny.cartography.star import Star
+
+# range queries are answered from a cache keyed on the query range rounded up to the nearest multiple of this many ly
+RANGE_BUCKET = 5
+
+
+class StarIndex:
+    """
+    KD-tree over star positions answering "every star within r ly of this one, nearest first"
+
+    Ship ranges only change when technology improves, so each star only ever sees a handful of distinct ranges. The
+    neighbours for a whole range bucket are computed once and sliced down to the exact range on every later query.
+    """
+
+    stars: List["Star"]
+    tree: cKDTree
+    _cache: Dict[Tuple[UUID, int], Tuple[List[Tuple["Star", float]], List[float]]]
+
+    def __init__(self, stars: List["Star"]):
+        self.stars = stars
+        self.tree = cKDTree(np.array([s.position.to_list() for s in stars]).reshape(-1, 3))
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.stars)
+
+    def _bucket(self, star: "Star", bucket: int):
+        key = (star.uuid, bucket)
+        if key not in self._cache:
+            indexes = self.tree.query_ball_point(
+                star.position.to_list(), bucket * RANGE_BUCKET, return_sorted=True
+            )
+            neighbours = sorted(
+                (
+                    (other, other.position.distance(star.position))
+                    for other in (self.stars[index] for index in indexes)
+                    if other is not star
+                ),
+                key=lambda tuple_: tuple_[1],
+            )
+            self._cache[key] = (neighbours, [distance for _, distance in neighbours])
+        return self._cache[key]
+
+    def within(self, star: "Star", distance: float) -> List[Tuple["Star", float]]:
+        """
+        :returns every indexed star other than star itself no further than distance ly away, with its distance, sorted
+            nearest first
+        """
+        if distance < 0:
+            return []
+        bucket = max(math.ceil(distance / RANGE_BUCKET), 1)
+        neighbours, distances = self._bucket(star, bucket)
+        return neighbours[: bisect_right(distances, distance)]
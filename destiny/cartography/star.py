@@ -1,11 +1,41 @@
 import math
 from random import Random
-from typing import List, Tuple
+from typing import List, Tuple, Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
 
 from destiny.cartography.planet import Planet
+from destiny.cartography.systems import SystemCache, hydrate_planets
 from destiny.maths import Vec3
 
+if TYPE_CHECKING:
+    from destiny.cartography.spatial import StarIndex
+
+STELLAR_MASSES = {
+    "O": (16, 120),
+    "B": (2.1, 16),
+    "A": (1.4, 2.1),
+    "F": (1.04, 1.4),
+    "G": (0.8, 1.04),
+    "K": (0.45, 0.8),
+    "M": (0.08, 0.45),
+}
+
+STELLAR_RADII = {
+    "O": (6.6, 50),
+    "B": (1.8, 6.6),
+    "A": (1.4, 1.8),
+    "F": (1.15, 1.4),
+    "G": (0.96, 1.15),
+    "K": (0.7, 0.96),
+    "M": (0.1, 0.7),
+}
+
+
+def interpolate_spectral_range(ranges: dict, letter: str, number: float) -> float:
+    min_t, max_t = ranges[letter]
+    mod = number / 9
+    return min_t + (max_t - min_t) * mod
+
 
 class Star:
     uuid: UUID
@@ -15,8 +45,18 @@ class Star:
     colour: dict
     luminosity: float
     position: Vec3
-    planets: List[Planet]
     precomputed_neighbours: List[Tuple["Star", float]]
+    spatial_index: Optional["StarIndex"]
+
+    mass: float
+    radius: float
+    inner_habitable_zone: float
+    outer_habitable_zone: float
+    frost_line: float
+
+    _planets: Optional[List[Planet]]
+    _habitable_planets: Optional[List[Planet]]
+    _cached_system: Optional[dict]
 
     def __init__(
         self,
@@ -26,8 +66,8 @@ class Star:
         spectral_subtype_str: str,
         colour: dict,
         luminosity: float,
+        systems: Optional[SystemCache] = None,
     ):
-        rng = Random(name)
         self.uuid = uuid4()
 
         self.position = position
@@ -37,14 +77,68 @@ class Star:
         self.colour = colour
         self.luminosity = luminosity
 
-        self.planets = []
-        self._generate_planets(rng)
+        self.mass = interpolate_spectral_range(
+            STELLAR_MASSES, self.spectral_type, self.spectral_subtype
+        )
+        self.radius = interpolate_spectral_range(
+            STELLAR_RADII, self.spectral_type, self.spectral_subtype
+        )
+        self.inner_habitable_zone = math.sqrt(self.luminosity * 0.9025)
+        self.outer_habitable_zone = math.sqrt(self.luminosity * 6.25)
+        self.frost_line = math.sqrt(self.luminosity * 16)
+
+        self._habitable_planets = None
+        self._cached_system = systems.get(self) if systems else None
+        if self._cached_system is None:
+            self._planets = []
+            self._generate_planets(Random(name))
+            self.invalidate_habitable_planets()
+            if systems:
+                systems.store(self)
+        else:
+            self._planets = None
 
         self.precomputed_neighbours = []
+        self.spatial_index = None
+
+    @property
+    def planets(self) -> List[Planet]:
+        if self._planets is None:
+            self._planets = hydrate_planets(self, self._cached_system)
+            self._cached_system = None
+        return self._planets
+
+    @planets.setter
+    def planets(self, planets: List[Planet]):
+        self._planets = planets
+        self._cached_system = None
+        self.invalidate_habitable_planets()
 
     @property
-    def habitable_planets(self):
-        return [p for p in self.planets if p.habitable]
+    def habitable_planets(self) -> List[Planet]:
+        if self._habitable_planets is None:
+            self._habitable_planets = [p for p in self.planets if p.habitable]
+        return self._habitable_planets
+
+    def invalidate_habitable_planets(self):
+        """
+        Must be called whenever a planet is added to or removed from this star, or a planet's habitability changes
+        """
+        self._habitable_planets = None
+
+    def neighbours_within(self, distance: float) -> List[Tuple["Star", float]]:
+        """
+        :returns every habitable star within distance ly of this one, with its distance, sorted nearest first. Stars
+            that have not been spatially indexed only know about their Delaunay neighbours.
+        """
+        if self.spatial_index is not None:
+            return self.spatial_index.within(self, distance)
+        neighbours = []
+        for star, star_distance in self.precomputed_neighbours:
+            if star_distance > distance:
+                break
+            neighbours.append((star, star_distance))
+        return neighbours
 
     def surface_temperature(self, orbital_radius: float, bond_albedo: float = 0.3):
         boltzman_constant = 5.670373 * (10**-8)
@@ -203,55 +297,19 @@ class Star:
             moons=1,
         )
 
-    @property
-    def mass(self):
-        masses = {
-            "O": (16, 120),
-            "B": (2.1, 16),
-            "A": (1.4, 2.1),
-            "F": (1.04, 1.4),
-            "G": (0.8, 1.04),
-            "K": (0.45, 0.8),
-            "M": (0.08, 0.45),
-        }
-
-        letter, number = self.spectral_type, self.spectral_subtype
-        min_t, max_t = masses[letter]
-        mod = number / 9
-        return min_t + (max_t - min_t) * mod
-
-    @property
-    def radius(self):
-        radius = {
-            "O": (6.6, 50),
-            "B": (1.8, 6.6),
-            "A": (1.4, 1.8),
-            "F": (1.15, 1.4),
-            "G": (0.96, 1.15),
-            "K": (0.7, 0.96),
-            "M": (0.1, 0.7),
-        }
-
-        letter, number = self.spectral_type, self.spectral_subtype
-        min_t, max_t = radius[letter]
-        mod = number / 9
-        return min_t + (max_t - min_t) * mod
-
-    @property
-    def inner_habitable_zone(self):
-        return math.sqrt(self.luminosity * 0.9025)
-
-    @property
-    def outer_habitable_zone(self):
-        return math.sqrt(self.luminosity * 6.25)
-
-    @property
-    def frost_line(self):
-        return math.sqrt(self.luminosity * 16)
-
     @property
     def habitable(self):
-        return any(p.habitable for p in self.planets)
+        if self._planets is None:
+            return self._cached_system["habitable"]
+        return bool(self.habitable_planets)
+
+    def __getstate__(self):
+        # neighbours link every habitable star to every other, which pickle would follow recursively until it ran out
+        # of stack, so they are saved and restored separately by the simulation
+        state = self.__dict__.copy()
+        state["precomputed_neighbours"] = []
+        state["spatial_index"] = None
+        return state
 
     def __hash__(self):
         return (self.name, self.position).__hash__()
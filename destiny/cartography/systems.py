@@ -0,0 +1,107 @@
+import json
+import os
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from destiny.cartography.catalogue import CACHE_DIRECTORY
+from destiny.cartography.planet import Planet, LifeType, LifeLevel
+
+if TYPE_CHECKING:
+    from destiny.cartography.star import Star
+
+# bump whenever Star._generate_planets or Planet.generate_life change what they produce
+PLANET_GENERATOR_VERSION = 1
+
+SYSTEM_CACHE = os.path.join(CACHE_DIRECTORY, f"systems-v{PLANET_GENERATOR_VERSION}.json")
+
+
+class SystemCache:
+    """
+    Persistent store of procedurally generated planetary systems
+
+    Star generation is seeded on the star's name, so a system only needs to be generated once per generator version.
+    Each system is stored as its habitability plus a list of planet parameters, and is hydrated back into Planet objects
+    only when the star's planets are first accessed.
+    """
+
+    path: str
+    systems: Dict[str, dict]
+    dirty: bool
+
+    def __init__(self, path: str = SYSTEM_CACHE):
+        self.path = path
+        self.systems = {}
+        self.dirty = False
+        if os.path.exists(path):
+            with open(path) as cache_file:
+                cached = json.load(cache_file)
+            if cached.get("version") == PLANET_GENERATOR_VERSION:
+                self.systems = cached["systems"]
+
+    @staticmethod
+    def key(star: "Star") -> str:
+        return f"{star.name}|{star.spectral_type}{star.spectral_subtype!r}|{star.luminosity!r}"
+
+    def get(self, star: "Star") -> Optional[dict]:
+        return self.systems.get(self.key(star))
+
+    def store(self, star: "Star"):
+        self.systems[self.key(star)] = {
+            "habitable": star.habitable,
+            "planets": [
+                [
+                    planet.mass,
+                    planet.day_length_hours,
+                    planet.orbital_radius,
+                    planet.solid,
+                    planet.surface_water,
+                    planet.greenhouse_factor,
+                    planet.moons,
+                    planet.native_life.value if planet.native_life else None,
+                    planet.life_level.value,
+                ]
+                for planet in star.planets
+            ],
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        partial_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(partial_path, "w") as cache_file:
+            json.dump(
+                {"version": PLANET_GENERATOR_VERSION, "systems": self.systems},
+                cache_file,
+            )
+        os.replace(partial_path, self.path)
+        self.dirty = False
+
+
+def hydrate_planets(star: "Star", system: dict) -> List[Planet]:
+    planets = []
+    for (
+        mass,
+        day_length,
+        orbital_radius,
+        solid,
+        surface_water,
+        greenhouse_factor,
+        moons,
+        native_life,
+        life_level,
+    ) in system["planets"]:
+        planet = Planet(
+            star=star,
+            mass=mass,
+            day_length=day_length,
+            orbital_radius=orbital_radius,
+            solid=solid,
+            surface_water=surface_water,
+            greenhouse_factor=greenhouse_factor,
+            moons=moons,
+        )
+        planet.native_life = LifeType(native_life) if native_life else None
+        planet.life_level = LifeLevel(life_level)
+        planets.append(planet)
+    return planets
@@ -0,0 +1,125 @@
+"""
+Compact binary checkpoints of a whole simulation
+
+Checkpoints are pickles with compact encodings for the objects there are most of. Every pop is written up front in a
+single table, with its descendents as indexes into that table rather than references, so pickling never follows a
+family tree and stays shallow however many generations a run goes on for. Uuids are written as their 16 bytes, children
+as their raw cohort counts, and random generators as their packed internal state.
+
+Pops that no longer live in a settlement or ship are kept only for their history, and never draw random numbers again,
+so their random generators aren't saved.
+"""
+import pickle
+from array import array
+from random import Random
+from typing import BinaryIO, Dict, List, TYPE_CHECKING
+from uuid import UUID
+
+from destiny.sociology.pop import Population
+from destiny.sociology.utils.cohorts import Cohorts
+
+if TYPE_CHECKING:
+    from destiny.simulation import Simulation
+
+# written before everything else, and bumped whenever the layout changes, so that old checkpoints are refused up front
+CHECKPOINT_VERSION = 1
+
+
+class _Unset:
+    """
+    Stands in for a pop's slots that were never set
+    """
+
+
+def _new_population() -> Population:
+    return Population.__new__(Population)
+
+
+def _set_population_state(pop: Population, state: tuple):
+    for slot, value in zip(Population.__slots__, state):
+        if value is not _Unset:
+            setattr(pop, slot, value)
+
+
+def _new_uuid(uuid_bytes: bytes) -> UUID:
+    return UUID(bytes=uuid_bytes)
+
+
+def _new_random(internal_state: bytes, gauss_next) -> Random:
+    rng = Random()
+    rng.setstate((3, tuple(array("I", internal_state)), gauss_next))
+    return rng
+
+
+class CheckpointPickler(pickle.Pickler):
+    pop_indexes: Dict[int, int]
+    live_pops: Dict[int, Population]
+
+    def __init__(self, file: BinaryIO, pops: List[Population], live_pops: List[Population]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.pop_indexes = {id(pop): n for n, pop in enumerate(pops)}
+        self.live_pops = {id(pop): pop for pop in live_pops}
+
+    def reducer_override(self, obj):
+        obj_type = type(obj)
+        if obj_type is Population:
+            state = []
+            for slot in Population.__slots__:
+                value = getattr(obj, slot, _Unset)
+                if slot == "descendent_pops":
+                    value = array("i", [self.pop_indexes[id(pop)] for pop in value])
+                elif slot == "rng" and id(obj) not in self.live_pops:
+                    value = None
+                state.append(value)
+            return _new_population, (), tuple(state), None, None, _set_population_state
+        if obj_type is UUID:
+            return _new_uuid, (obj.bytes,)
+        if obj_type is Cohorts:
+            return Cohorts.from_ring, (obj.counts.tobytes(), obj.head)
+        if obj_type is Random:
+            version, internal_state, gauss_next = obj.getstate()
+            return _new_random, (array("I", internal_state).tobytes(), gauss_next)
+        return NotImplemented
+
+
+def all_pops(simulation: "Simulation") -> List[Population]:
+    """
+    :returns every pop living in a settlement or ship, followed by every other pop they lead to through governments and
+        descendents, in a fixed order
+    """
+    pops = live_pops(simulation)
+    for planet in simulation.inhabited_planets:
+        for settlement in planet.settlements:
+            government = settlement.government
+            pops += getattr(government, "council", [])
+            if hasattr(government, "dictator"):
+                pops.append(government.dictator)
+    seen = {}
+    while pops:
+        pop = pops.pop()
+        if id(pop) not in seen:
+            seen[id(pop)] = pop
+            pops += pop.descendent_pops
+    return list(seen.values())
+
+
+def live_pops(simulation: "Simulation") -> List[Population]:
+    pops = [pop for planet in simulation.inhabited_planets for settlement in planet.settlements for pop in settlement.pops]
+    pops += [pop for ship in simulation.ships_in_flight for pop in ship.cargo]
+    return pops
+
+
+def write_checkpoint(file: BinaryIO, simulation: "Simulation"):
+    pickle.dump(CHECKPOINT_VERSION, file, protocol=pickle.HIGHEST_PROTOCOL)
+    pops = all_pops(simulation)
+    CheckpointPickler(file, pops, live_pops(simulation)).dump((pops, simulation))
+
+
+def read_checkpoint(file: BinaryIO) -> "Simulation":
+    version = pickle.load(file)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint is version {version}, but only version {CHECKPOINT_VERSION} can be read")
+    pops, simulation = pickle.load(file)
+    for pop in pops:
+        pop.descendent_pops = [pops[n] for n in pop.descendent_pops]
+    return simulation
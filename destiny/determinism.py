@@ -0,0 +1,129 @@
+"""
+Checks that a short seeded run ends up in the same state every year whatever the number of workers, with every
+population total checked against a full recount as it's read
+
+    python -m destiny.determinism
+    python -m destiny.determinism --seed 7 --years 40 --workers 1 2 4 --population-multiplier 1
+"""
+import argparse
+import hashlib
+import os
+import sys
+from contextlib import redirect_stdout
+from typing import List
+
+from destiny.cartography.mapping import load_stellar_catalogue
+from destiny.cartography.star import Star
+from destiny import parallel
+from destiny.simulation import Simulation
+from destiny.sociology import constants
+from destiny.sociology.utils.city_names import CITY_LIST
+from destiny.sociology.utils.shipnames import SHIP_NAMES
+
+# small enough for a quick check, while still giving Earth's settlements pops to trade with each other
+POPULATION_MULTIPLIER = 0.5
+
+
+def state_digest(simulation: Simulation) -> str:
+    """
+    A digest of every planet, settlement, government and pop, which differs if any of them do
+    """
+    digest = hashlib.md5()
+    for planet in simulation.inhabited_planets:
+        digest.update(repr((planet.name, planet.population)).encode())
+        for settlement in planet.settlements:
+            government = settlement.government
+            members = getattr(government, "council", []) + (
+                [government.dictator] if hasattr(government, "dictator") else []
+            )
+            digest.update(
+                repr(
+                    (
+                        settlement.name,
+                        settlement.population,
+                        government.name,
+                        government.philosophy,
+                        [str(member.uuid) for member in members],
+                    )
+                ).encode()
+            )
+            digest.update(
+                repr(
+                    [
+                        (
+                            str(pop.uuid),
+                            pop.starting_population,
+                            pop.descendents,
+                            pop.average_age,
+                            pop.happiness,
+                            pop.tolerance,
+                            pop.stationary_migrant,
+                            pop.mergeable,
+                        )
+                        for pop in settlement.pops
+                    ]
+                ).encode()
+            )
+    digest.update(repr([(str(ship.uuid), len(ship.cargo)) for ship in simulation.ships_in_flight]).encode())
+    return digest.hexdigest()
+
+
+def run_digests(
+    starmap: List[Star], seed: int, years: int, workers: int, population_multiplier: float = POPULATION_MULTIPLIER
+) -> List[str]:
+    """
+    :returns the digest of the simulation's state at the end of each year
+    """
+    simulation = Simulation(seed, starmap=starmap, population_multiplier=population_multiplier)
+    digests = []
+    try:
+        while simulation.year < years:
+            simulation.process_year(workers)
+            digests.append(state_digest(simulation))
+    finally:
+        simulation.close()
+    return digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    # a seed and worker counts under which settlements used to send back stale copies of each other's pops
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--years", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--population-multiplier", type=float, default=POPULATION_MULTIPLIER)
+    args = parser.parse_args()
+
+    # every run uses up city and ship names, so each starts from the same names as the first
+    ship_names = list(SHIP_NAMES)
+    city_list = {country: list(cities) for country, cities in CITY_LIST.items()}
+
+    constants.CHECK_POPULATION_TOTALS = True
+    # share out even the first years' handful of settlements, so that workers' copies are checked from the start
+    parallel.PARALLEL_MIN_SETTLEMENTS = 1
+    expected = None
+    diverged = False
+    for workers in args.workers:
+        SHIP_NAMES[:] = ship_names
+        CITY_LIST.clear()
+        CITY_LIST.update({country: list(cities) for country, cities in city_list.items()})
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            # each run modifies the catalogue it's given
+            digests = run_digests(
+                load_stellar_catalogue(), args.seed, args.years, workers, args.population_multiplier
+            )
+        if expected is None:
+            expected = digests
+            print(f"{workers} workers: {args.years} years simulated")
+            continue
+        year = next((n for n, (a, b) in enumerate(zip(expected, digests)) if a != b), None)
+        if year is None:
+            print(f"{workers} workers: identical to {args.workers[0]} workers")
+        else:
+            print(f"{workers} workers: diverged from {args.workers[0]} workers in year {year + 1}")
+            diverged = True
+    sys.exit(1 if diverged else 0)
+
+
+if __name__ == "__main__":
+    main()
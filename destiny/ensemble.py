@@ -0,0 +1,179 @@
+"""
+Runs many seeded simulations in parallel and summarises each of them
+
+    python -m destiny.ensemble --runs 16 --years 250 --seed 0 --output ensemble.json
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import time
+from contextlib import redirect_stdout
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from destiny.cartography.mapping import load_stellar_catalogue
+from destiny.cartography.star import Star
+from destiny.simulation import Simulation
+
+
+class ColonisedPlanet(BaseModel):
+    name: str
+    star: str
+    founded: int
+    population: int
+
+
+class GovernmentChange(BaseModel):
+    year: int
+    planet: str
+    settlement: str
+    government: str
+    philosophy: str
+
+
+class RunSummary(BaseModel):
+    seed: int
+    years: int
+    seconds: float
+    population_by_year: List[int]
+    inhabited_planets_by_year: List[int]
+    colonised_planets: List[ColonisedPlanet]
+    government_changes: List[GovernmentChange]
+
+    @classmethod
+    def summarise(
+        cls,
+        simulation: Simulation,
+        seed: int,
+        seconds: float,
+        population_by_year: List[int],
+        inhabited_planets_by_year: List[int],
+    ):
+        return RunSummary(
+            seed=seed,
+            years=simulation.year,
+            seconds=seconds,
+            population_by_year=population_by_year,
+            inhabited_planets_by_year=inhabited_planets_by_year,
+            colonised_planets=[
+                ColonisedPlanet(
+                    name=planet.name,
+                    star=planet.planet.star.name,
+                    founded=planet.founding_year,
+                    population=planet.population,
+                )
+                for planet in simulation.inhabited_planets
+                if not planet.is_earth
+            ],
+            government_changes=[
+                GovernmentChange(
+                    year=year,
+                    planet=planet.name,
+                    settlement=settlement.name,
+                    government=government,
+                    philosophy=philosophy,
+                )
+                for planet in simulation.inhabited_planets
+                for settlement in planet.settlements
+                # the first entry is the government the settlement was founded with
+                for year, government, philosophy in settlement.government_history[1:]
+            ],
+        )
+
+
+class Ensemble(BaseModel):
+    runs: List[RunSummary]
+
+
+# loaded in the parent before forking, and shared copy-on-write by the workers
+_STARMAP: Optional[List[Star]] = None
+
+
+def _load_starmap():
+    global _STARMAP
+    # workers that weren't forked from a parent holding the catalogue have to load their own
+    if _STARMAP is None:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            _STARMAP = load_stellar_catalogue()
+
+
+def _run(args: Tuple[int, int]) -> RunSummary:
+    seed, years = args
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        simulation = Simulation(seed, starmap=_STARMAP)
+        population_by_year = []
+        inhabited_planets_by_year = []
+        while simulation.year < years:
+            simulation.process_year()
+            population_by_year.append(sum(p.population for p in simulation.inhabited_planets))
+            inhabited_planets_by_year.append(len(simulation.inhabited_planets))
+    return RunSummary.summarise(
+        simulation,
+        seed,
+        time.perf_counter() - start,
+        population_by_year,
+        inhabited_planets_by_year,
+    )
+
+
+def run_ensemble(
+    seeds: List[int], years: int = 250, workers: Optional[int] = None
+) -> Iterator[RunSummary]:
+    """
+    Runs a simulation for each seed, loading the stellar catalogue and its neighbour graph only once
+
+    Each run gets a freshly forked worker, since runs modify the catalogue they're given and consume the shared ship and
+    city names. Summaries are the same as those of the equivalent serial runs.
+
+    :param workers: the number of runs to simulate at once, every core by default
+    :returns each run's summary as it finishes, in seed order
+    """
+    global _STARMAP
+
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    if start_method == "fork":
+        _STARMAP = load_stellar_catalogue()
+        # keeps the collector from touching, and so copying, every page of the catalogue in each worker
+        gc.freeze()
+    try:
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(
+            workers or os.cpu_count(), initializer=_load_starmap, maxtasksperchild=1
+        ) as pool:
+            yield from pool.imap(_run, [(seed, years) for seed in seeds])
+    finally:
+        if start_method == "fork":
+            gc.unfreeze()
+        _STARMAP = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--years", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0, help="the first seed, incremented for each run")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="ensemble.json")
+    args = parser.parse_args()
+
+    runs = []
+    for summary in run_ensemble(
+        list(range(args.seed, args.seed + args.runs)), args.years, args.workers
+    ):
+        print(
+            f"Seed {summary.seed}: {summary.population_by_year[-1]:,} people on "
+            f"{summary.inhabited_planets_by_year[-1]} planets after {summary.years} years "
+            f"({summary.seconds:,.1f}s)"
+        )
+        runs.append(summary)
+
+    with open(args.output, "w") as ensemble_file:
+        ensemble_file.write(Ensemble(runs=runs).model_dump_json())
+    print(f"Written {len(runs)} runs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
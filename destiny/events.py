@@ -0,0 +1,399 @@
+import json
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import IO, Iterator, List, Tuple, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from destiny.sociology.science import ScienceNode
+
+
+class Level(IntEnum):
+    # per-planet status lines, several every year
+    DEBUG = 10
+    # things happening to planets, settlements and ships
+    INFO = 20
+    # nothing is ever emitted at this level, so it turns a sink off
+    SILENT = 100
+
+
+class Event:
+    """
+    Something that happened in the simulation
+
+    Events only hold the values describing what happened. They're formatted into a message or record by the sinks that
+    want them, so events nobody listens to cost nothing beyond the level check.
+    """
+
+    __slots__ = ()
+    level: Level = Level.INFO
+    # the slots of the event's class and every class it derives from, in order, as __slots__ only holds its own
+    fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = tuple(slot for base in reversed(cls.__mro__) for slot in vars(base).get("__slots__", ()))
+
+    @property
+    def kind(self) -> str:
+        return type(self).__name__
+
+    def message(self) -> str:
+        raise NotImplementedError()
+
+    def record(self) -> dict:
+        record = {"event": self.kind, "level": self.level.name}
+        for slot in self.fields:
+            value = getattr(self, slot)
+            record[slot] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        return record
+
+
+class YearStarted(Event):
+    __slots__ = ("year",)
+
+    def __init__(self, year: int):
+        self.year = year
+
+    def message(self) -> str:
+        return f"Year {self.year+1}"
+
+
+class CheckpointSaved(Event):
+    __slots__ = ("year", "path")
+
+    def __init__(self, year: int, path: str):
+        self.year = year
+        self.path = path
+
+    def message(self) -> str:
+        return f"Checkpointed year {self.year} to {self.path}"
+
+
+class RunResumed(Event):
+    __slots__ = ("year", "path")
+
+    def __init__(self, year: int, path: str):
+        self.year = year
+        self.path = path
+
+    def message(self) -> str:
+        return f"Resuming from year {self.year} of {self.path}"
+
+
+class PlanetStatus(Event):
+    __slots__ = ("year", "planet", "founding_year", "population", "pops", "states")
+    level = Level.DEBUG
+
+    def __init__(self, year: int, planet: str, founding_year: int, population: int, pops: int, states: int):
+        self.year = year
+        self.planet = planet
+        self.founding_year = founding_year
+        self.population = population
+        self.pops = pops
+        self.states = states
+
+    def message(self) -> str:
+        planet_year = self.year - self.founding_year
+        if planet_year == self.year:
+            header = f"Processing year {self.year+1} for {self.planet}"
+        else:
+            header = f"Processing year {self.year+1} (MY {planet_year+1}) for {self.planet}"
+        return f"{header}\nPopulation: {self.population:,} in {self.pops} pops across {self.states} states"
+
+
+class MigrationWanted(Event):
+    __slots__ = ("planet", "pops")
+    level = Level.DEBUG
+
+    def __init__(self, planet: str, pops: int):
+        self.planet = planet
+        self.pops = pops
+
+    def message(self) -> str:
+        return f"{self.pops} pops want to move"
+
+
+class MigrationSummary(Event):
+    __slots__ = ("planet", "moved", "emigrated", "stayed", "pops")
+    level = Level.DEBUG
+
+    def __init__(self, planet: str, moved: int, emigrated: int, stayed: int, pops: int):
+        self.planet = planet
+        self.moved = moved
+        self.emigrated = emigrated
+        self.stayed = stayed
+        self.pops = pops
+
+    def message(self) -> str:
+        return f"Moved {self.moved}, emigrated {self.emigrated}, stayed {self.stayed} of {self.pops}"
+
+
+class ScienceUnlocked(Event):
+    __slots__ = ("planet", "science_level", "discovery")
+
+    def __init__(self, planet: str, science_level: int, discovery: "ScienceNode"):
+        self.planet = planet
+        self.science_level = science_level
+        self.discovery = discovery
+
+    def message(self) -> str:
+        return f"{self.planet} has upgraded to science level {self.science_level} and unlocked {self.discovery}"
+
+
+class Starvation(Event):
+    __slots__ = ("settlement",)
+
+    def __init__(self, settlement: str):
+        self.settlement = settlement
+
+    def message(self) -> str:
+        return f"{self.settlement} cannot grow enough food! Their population has starved!"
+
+
+class StateFounded(Event):
+    __slots__ = ("planet", "settlement", "pops")
+
+    def __init__(self, planet: str, settlement: str, pops: int):
+        self.planet = planet
+        self.settlement = settlement
+        self.pops = pops
+
+    def message(self) -> str:
+        return f"{self.pops} pops have formed a new state of {self.settlement} on {self.planet}"
+
+
+class PlanetColonised(Event):
+    __slots__ = ("year", "planet", "star", "ship", "pops")
+
+    def __init__(self, year: int, planet: str, star: str, ship: str, pops: int):
+        self.year = year
+        self.planet = planet
+        self.star = star
+        self.ship = ship
+        self.pops = pops
+
+    def message(self) -> str:
+        return f"{self.ship} has settled {self.pops} pops on {self.planet} around {self.star}"
+
+
+class ShipDecommissioned(Event):
+    __slots__ = ("ship",)
+
+    def __init__(self, ship: str):
+        self.ship = ship
+
+    def message(self) -> str:
+        return f"{self.ship} has reached the end of its service life"
+
+
+class DictatorSucceeded(Event):
+    __slots__ = ("settlement", "philosophy")
+
+    def __init__(self, settlement: str, philosophy: str):
+        self.settlement = settlement
+        self.philosophy = philosophy
+
+    def message(self) -> str:
+        return f"The dictator of {self.settlement} has died. A new {self.philosophy} dictator has taken control"
+
+
+class GovernmentShifted(Event):
+    """
+    A government changing its philosophy without being replaced
+    """
+
+    __slots__ = ("settlement", "government", "old_philosophy", "philosophy")
+
+    def __init__(self, settlement: str, government: str, old_philosophy: str, philosophy: str):
+        self.settlement = settlement
+        self.government = government
+        self.old_philosophy = old_philosophy
+        self.philosophy = philosophy
+
+    def message(self) -> str:
+        return f"{self.settlement}'s {self.government} has shifted from {self.old_philosophy} towards {self.philosophy}"
+
+
+class CouncilShifted(GovernmentShifted):
+    __slots__ = ()
+
+    def message(self) -> str:
+        return f"The government of {self.settlement} has shifted away from {self.old_philosophy} towards {self.philosophy}"
+
+
+class PartyElected(GovernmentShifted):
+    __slots__ = ()
+
+    def message(self) -> str:
+        return f"{self.settlement} has voted out its {self.old_philosophy} government and elected a new {self.philosophy} party"
+
+
+class GovernmentChanged(Event):
+    """
+    A government being replaced by a new one, for one of the CAUSES
+    """
+
+    CAUSES = {
+        "revolt": "{settlement} have revolted against its {old} and formed a new {new}",
+        "violent overthrow": "{settlement} has violently overthrown its {old} and formed a new {new}",
+        "party coup": "The leading party in {settlement} has overthrown its {old} and formed a new {new}",
+        "autocrat coup": "Violent autocrats in {settlement} have overthrown its {old} and formed a new {new}",
+        "overthrow": "{settlement} has overthrown its {old} and formed a new {new}",
+    }
+
+    __slots__ = ("settlement", "cause", "old_government", "old_philosophy", "government", "philosophy")
+
+    def __init__(
+        self,
+        settlement: str,
+        cause: str,
+        old_government: str,
+        old_philosophy: str,
+        government: str,
+        philosophy: str,
+    ):
+        self.settlement = settlement
+        self.cause = cause
+        self.old_government = old_government
+        self.old_philosophy = old_philosophy
+        self.government = government
+        self.philosophy = philosophy
+
+    def message(self) -> str:
+        return self.CAUSES[self.cause].format(
+            settlement=self.settlement,
+            old=f"{self.old_philosophy} {self.old_government}",
+            new=f"{self.philosophy} {self.government}",
+        )
+
+
+class Sink:
+    level: Level
+
+    def __init__(self, level: Level = Level.INFO):
+        self.level = level
+
+    def write(self, event: Event):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class NullSink(Sink):
+    def __init__(self):
+        super().__init__(Level.SILENT)
+
+    def write(self, event: Event):
+        pass
+
+
+class StdoutSink(Sink):
+    def write(self, event: Event):
+        print(event.message())
+
+
+class JsonlSink(Sink):
+    """
+    Writes one JSON record per event to a file
+    """
+
+    file: IO[str]
+    owns_file: bool
+
+    def __init__(self, file: Union[str, IO[str]], level: Level = Level.INFO):
+        super().__init__(level)
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "w") if self.owns_file else file
+
+    def write(self, event: Event):
+        self.file.write(json.dumps(event.record()))
+        self.file.write("\n")
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class BufferSink(Sink):
+    """
+    Holds on to events so they can be replayed later, or in another process
+    """
+
+    events: List[Event]
+
+    def __init__(self, level: Level = Level.DEBUG):
+        super().__init__(level)
+        self.events = []
+
+    def write(self, event: Event):
+        self.events.append(event)
+
+
+class EventBus:
+    """
+    Passes events on to every sink that wants them
+
+    With no sinks, the default, nothing is wanted. Events that are expensive to even construct should be guarded with
+    wants(), so that runs nobody is watching do no formatting or counting for them.
+    """
+
+    sinks: List[Sink]
+    level: Level
+
+    def __init__(self):
+        self.sinks = []
+        self.level = Level.SILENT
+
+    def _update_level(self):
+        self.level = min((sink.level for sink in self.sinks), default=Level.SILENT)
+
+    def add_sink(self, sink: Sink) -> Sink:
+        self.sinks.append(sink)
+        self._update_level()
+        return sink
+
+    def remove_sink(self, sink: Sink):
+        self.sinks.remove(sink)
+        sink.close()
+        self._update_level()
+
+    def wants(self, level: Level) -> bool:
+        return level >= self.level
+
+    def emit(self, event: Event):
+        if event.level < self.level:
+            return
+        for sink in self.sinks:
+            if event.level >= sink.level:
+                sink.write(event)
+
+    def replay(self, events: List[Event]):
+        for event in events:
+            self.emit(event)
+
+    @contextmanager
+    def capture(self) -> Iterator[List[Event]]:
+        """
+        Diverts every event the bus currently wants into a list instead of the sinks, for replaying later
+        """
+        sinks = self.sinks
+        buffer = BufferSink(self.level)
+        self.sinks = [buffer]
+        try:
+            yield buffer.events
+        finally:
+            self.sinks = sinks
+
+    @contextmanager
+    def sink(self, sink: Sink) -> Iterator[Sink]:
+        self.add_sink(sink)
+        try:
+            yield sink
+        finally:
+            self.remove_sink(sink)
+
+
+EVENT_BUS = EventBus()
@@ -2,6 +2,8 @@ import math
 
 
 class Vec3:
+    __slots__ = ("x", "y", "z")
+
     x: float
     y: float
     z: float
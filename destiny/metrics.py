@@ -0,0 +1,112 @@
+import csv
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List
+
+# shared by every phase while metrics are disabled, so timing a phase costs a method call and nothing else
+_NULL_PHASE = nullcontext()
+
+
+class Phase:
+    """
+    Adds the time spent inside it to its phase's total for the year
+
+    A phase can contain other phases, whose time then counts towards both.
+    """
+
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.key = f"{name}_seconds"
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.metrics.current[self.key] += time.perf_counter() - self.start
+
+
+class Metrics:
+    """
+    Per-year timings and counts for each phase of the simulation, collected into a table with a row per year
+
+    Disabled by default. Phase times and counts add up over the year, so a phase that runs once per planet or settlement
+    reports its total across all of them, and phases run in worker processes report the total time across workers.
+    """
+
+    enabled: bool
+    current: Dict[str, float]
+    years: List[Dict[str, float]]
+    _phases: Dict[str, Phase]
+
+    def __init__(self):
+        self.enabled = False
+        self.current = defaultdict(int)
+        self.years = []
+        self._phases = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.current = defaultdict(int)
+        self.years = []
+
+    def phase(self, name: str) -> ContextManager:
+        if not self.enabled:
+            return _NULL_PHASE
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = Phase(self, name)
+        return phase
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.current[name] += amount
+
+    def end_year(self, year: int):
+        """
+        Adds the metrics collected since the last year ended as the row for year
+        """
+        if self.enabled:
+            self.years.append({"year": year, **self.current})
+        self.current = defaultdict(int)
+
+    @contextmanager
+    def collect(self) -> Iterator[Dict[str, float]]:
+        """
+        Collects metrics into a separate set of totals, for merging into this year's later, or in another process
+        """
+        current = self.current
+        self.current = defaultdict(int)
+        try:
+            yield self.current
+        finally:
+            self.current = current
+
+    def merge(self, collected: Dict[str, float]):
+        for name, value in collected.items():
+            self.current[name] += value
+
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(column for row in self.years for column in row))
+
+    def write_csv(self, path: str):
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=self.columns(), restval=0)
+            writer.writeheader()
+            writer.writerows(self.years)
+
+    def write_json(self, path: str):
+        with open(path, "w") as json_file:
+            json.dump(self.years, json_file)
+
+
+METRICS = Metrics()
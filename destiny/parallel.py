@@ -0,0 +1,634 @@
+import gc
+import io
+import multiprocessing
+import pickle
+import traceback
+from contextlib import contextmanager
+from functools import partial
+from itertools import compress
+from operator import attrgetter, is_, is_not
+from random import Random
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from uuid import UUID
+
+from destiny.events import EVENT_BUS, Event
+from destiny.metrics import METRICS
+from destiny.sociology import constants
+from destiny.sociology.inhabitedplanet import InhabitedPlanet
+from destiny.sociology.pop import Population
+from destiny.sociology.settlement import Settlement
+from destiny.sociology.utils.cohorts import Cohorts
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+SettlementResult = Tuple[List[Tuple[Settlement, "Population"]], int, int, float]
+
+# years with fewer settlements than this run serially even with workers, as there's too little to share between them
+PARALLEL_MIN_SETTLEMENTS = 8
+
+
+class SettlementTask:
+    """
+    One settlement's local phase of a year: births and deaths, government, and deciding who wants to leave
+
+    Each task draws from the settlement's own random stream for the year, and only ever touches its own settlement,
+    government and pops, so tasks give the same results whichever process runs them. Governments pin their dictator and
+    councilors, so that none of them ever lives in another settlement, where another task would be changing it.
+    """
+
+    __slots__ = ("settlement", "year", "birth_rate_modifier", "is_earth", "rng")
+
+    settlement: Settlement
+    year: int
+    birth_rate_modifier: float
+    is_earth: bool
+    rng: Random
+
+    def __init__(
+        self,
+        settlement: Settlement,
+        year: int,
+        birth_rate_modifier: float,
+        is_earth: bool,
+        rng: Random,
+    ):
+        self.settlement = settlement
+        self.year = year
+        self.birth_rate_modifier = birth_rate_modifier
+        self.is_earth = is_earth
+        self.rng = rng
+
+    def touched(self) -> List[object]:
+        """
+        :returns every pre-existing object whose state the task can change, the settlement first: its government, its
+            pops, and any members of the government who have died or been merged away, and so no longer live anywhere
+        """
+        settlement = self.settlement
+        government = settlement.government
+        touched = [settlement, government] + settlement.pops
+        members = getattr(government, "council", []) + ([government.dictator] if hasattr(government, "dictator") else [])
+        residents = set(map(id, settlement.pops))
+        touched += [member for member in dict.fromkeys(members) if id(member) not in residents]
+        return touched
+
+    def run(self) -> Tuple[SettlementResult, List[Event]]:
+        """
+        :returns the settlement's results and every event it emitted
+        """
+        self.settlement.bind_rng(self.rng)
+        with EVENT_BUS.capture() as events:
+            result = self.settlement.process_year(
+                self.year, self.birth_rate_modifier, self.is_earth
+            )
+        return result, events
+
+
+# the names of each slotted class's slots, and a getter for all of them at once
+_SLOT_GETTERS: Dict[type, Optional[Tuple[Tuple[str, ...], Callable[[object], tuple]]]] = {}
+
+# the types of values that can change without being replaced, so snapshots copy what they hold
+_MUTABLE_TYPES = frozenset((list, dict, Cohorts))
+
+
+def slot_getter(obj_type: type) -> Optional[Tuple[Tuple[str, ...], Callable[[object], tuple]]]:
+    """
+    :returns the names of the type's slots and a getter for all of their values at once, or None if it has no slots
+    """
+    try:
+        return _SLOT_GETTERS[obj_type]
+    except KeyError:
+        slots = obj_type.__dict__.get("__slots__")
+        getter = _SLOT_GETTERS[obj_type] = None if slots is None else (tuple(slots), attrgetter(*slots))
+        return getter
+
+
+def object_state(obj: object) -> dict:
+    getter = slot_getter(type(obj))
+    if getter is None:
+        return dict(obj.__dict__)
+    try:
+        return dict(zip(getter[0], getter[1](obj)))
+    except AttributeError:
+        return {slot: getattr(obj, slot) for slot in getter[0] if hasattr(obj, slot)}
+
+
+class Appended:
+    """
+    The items appended to a list attribute, sent in place of the whole list
+    """
+
+    __slots__ = ("items",)
+
+    items: list
+
+    def __init__(self, items: list):
+        self.items = items
+
+    def __reduce__(self):
+        return Appended, (self.items,)
+
+
+def contents(value: object) -> object:
+    # cohorts age every year, so are always sent back rather than copied and compared
+    return None if type(value) is Cohorts else value.copy()
+
+
+def changed_contents(value: object, copy: object, appended: set) -> object:
+    """
+    :param appended: the ids of the lists already sent as Appended, which another object shares
+    :returns the value if what it holds may have changed since it was copied, Appended if it's a list that has only
+        been added to, or None if it hasn't changed
+    """
+    value_type = type(value)
+    if value_type is list:
+        if len(value) < len(copy) or not all(map(is_, value, copy)):
+            return value
+        if len(value) == len(copy) or id(value) in appended:
+            return None
+        appended.add(id(value))
+        return Appended(value[len(copy):])
+    if value_type is dict:
+        if len(value) != len(copy) or any(value.get(key, Appended) is not item for key, item in copy.items()):
+            return value
+        return None
+    return value
+
+
+def snapshot(obj: object) -> Tuple[object, dict]:
+    """
+    :returns the object's state, as a tuple of its slots' values if it has them all, and copies of what the lists,
+        dicts and cohorts in it hold, by slot index or attribute name
+    """
+    getter = slot_getter(type(obj))
+    try:
+        state = getter[1](obj)
+        keys = range(len(state))
+        values = state
+    except (TypeError, AttributeError):
+        state = object_state(obj)
+        keys = state.keys()
+        values = state.values()
+    mutable = compress(keys, map(_MUTABLE_TYPES.__contains__, map(type, values)))
+    return state, {key: contents(state[key]) for key in mutable}
+
+
+def changed_state(obj: object, before: Tuple[object, dict], appended: set) -> dict:
+    """
+    :param appended: the ids of the lists already sent as Appended, which another object shares
+    :returns the attributes of obj that have been replaced or changed since its snapshot was taken, with lists that have
+        only been added to as Appended
+    """
+    state, copies = before
+    if type(state) is tuple:
+        names, getter = slot_getter(type(obj))
+        values = getter(obj)
+        changed = dict(compress(zip(names, values), map(is_not, values, state)))
+        for index, copy in copies.items():
+            value = values[index]
+            if value is state[index]:
+                change = changed_contents(value, copy, appended)
+                if change is not None:
+                    changed[names[index]] = change
+        return changed
+
+    current = object_state(obj)
+    changed = {name: value for name, value in current.items() if value is not state.get(name, Appended)}
+    for name, copy in copies.items():
+        value = current.get(name, Appended)
+        if value is state[name]:
+            change = changed_contents(value, copy, appended)
+            if change is not None:
+                changed[name] = change
+    return changed
+
+
+def _uuid(value: int) -> UUID:
+    return UUID(int=value)
+
+
+def _cohorts(buffer: bytes, head: int) -> Cohorts:
+    return Cohorts.from_ring(buffer, head)
+
+
+def compact_reduction(obj: object):
+    """
+    Reduces the small objects every pop holds to their raw values, which pickle far faster than their defaults
+    """
+    obj_type = type(obj)
+    if obj_type is UUID:
+        return _uuid, (obj.int,)
+    if obj_type is Cohorts:
+        return _cohorts, (obj.counts.tobytes(), obj.head)
+    return NotImplemented
+
+
+# refer to pops and settlements by the int of their uuid, and to a task's touched objects by position, across processes.
+# Each is resolved by the unpickler on the other side.
+def _pop(key: int):
+    raise NotImplementedError()
+
+
+def _new_pop(key: int):
+    raise NotImplementedError()
+
+
+def _settlement(key: int):
+    raise NotImplementedError()
+
+
+def _touched(task: int, index: int):
+    raise NotImplementedError()
+
+
+def _known_pop(pops: Dict[int, Population], key: int) -> Population:
+    """
+    :returns the pop with the key, starting out with only its uuid if it hasn't been seen before
+    """
+    pop = pops.get(key)
+    if pop is None:
+        pop = pops[key] = Population.__new__(Population)
+        pop.uuid = UUID(int=key)
+    return pop
+
+
+def _known_settlement(settlements: Dict[int, Settlement], key: int) -> Settlement:
+    settlement = settlements.get(key)
+    if settlement is None:
+        settlement = settlements[key] = Settlement.__new__(Settlement)
+    return settlement
+
+
+def _registered_pop(pops: Dict[int, Population], key: int) -> Population:
+    pop = pops[key] = Population.__new__(Population)
+    return pop
+
+
+def _touched_object(touched: List[List[object]], task: int, index: int) -> object:
+    return touched[task][index]
+
+
+class TaskPickler(pickle.Pickler):
+    """
+    Pickles a worker's jobs in the parent, referring to every pop and settlement by key, and remembering each pop it
+    refers to so that the worker's changes can refer back to it
+    """
+
+    pops: Dict[int, Population]
+
+    def __init__(self, file, pops: Dict[int, Population]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.pops = pops
+
+    def reducer_override(self, obj):
+        obj_type = type(obj)
+        if obj_type is Population:
+            key = obj.uuid.int
+            if self.pops.setdefault(key, obj) is not obj:
+                raise pickle.PicklingError(f"More than one pop has the uuid {obj.uuid}")
+            return _pop, (key,)
+        if obj_type is Settlement:
+            return _settlement, (obj.uuid.int,)
+        if obj_type is InhabitedPlanet:
+            raise pickle.PicklingError("Settlement tasks can't refer to planets")
+        return compact_reduction(obj)
+
+
+class TaskUnpickler(pickle.Unpickler):
+    """
+    Unpickles a worker's jobs, resolving pops and settlements to the worker's own copies of them. Pops the worker hasn't
+    been sent yet start out with only their uuid, which is all a task ever reads of pops beyond its own settlement.
+    """
+
+    pops: Dict[int, Population]
+    settlements: Dict[int, Settlement]
+
+    def __init__(self, file, pops: Dict[int, Population], settlements: Dict[int, Settlement]):
+        super().__init__(file)
+        self.pops = pops
+        self.settlements = settlements
+
+    # resolvers are bound to the registries rather than the unpickler, as its memo holds on to them, and a cycle through
+    # the memo would keep everything unpickled alive until the collector's next pass
+    def find_class(self, module, name):
+        if module == __name__ and name == "_pop":
+            return partial(_known_pop, self.pops)
+        if module == __name__ and name == "_settlement":
+            return partial(_known_settlement, self.settlements)
+        return super().find_class(module, name)
+
+
+class ChangesPickler(pickle.Pickler):
+    """
+    Pickles tasks' changes and results in a worker, referring to the pops, settlements and governments the parent
+    already has, so that only what the tasks changed or created is sent back
+    """
+
+    pops: Dict[int, Population]
+    governments: Dict[int, Tuple[int, int]]
+
+    def __init__(self, file, pops: Dict[int, Population], touched: List[List[object]]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.pops = pops
+        self.governments = {id(objs[1]): (task, 1) for task, objs in enumerate(touched)}
+
+    def reducer_override(self, obj):
+        obj_type = type(obj)
+        if obj_type is Population:
+            key = obj.uuid.int
+            if key in self.pops:
+                return _pop, (key,)
+            self.pops[key] = obj
+            return _new_pop, (key,), (None, object_state(obj))
+        if obj_type is Settlement:
+            return _settlement, (obj.uuid.int,)
+        government = self.governments.get(id(obj))
+        if government is not None:
+            return _touched, government
+        return compact_reduction(obj)
+
+
+class ChangesUnpickler(pickle.Unpickler):
+    pops: Dict[int, Population]
+    settlements: Dict[int, Settlement]
+    touched: List[List[object]]
+
+    def __init__(
+        self,
+        file,
+        pops: Dict[int, Population],
+        settlements: Dict[int, Settlement],
+        touched: List[List[object]],
+    ):
+        super().__init__(file)
+        self.pops = pops
+        self.settlements = settlements
+        self.touched = touched
+
+    def find_class(self, module, name):
+        if module == __name__:
+            if name == "_pop":
+                return self.pops.__getitem__
+            if name == "_new_pop":
+                return partial(_registered_pop, self.pops)
+            if name == "_settlement":
+                return self.settlements.__getitem__
+            if name == "_touched":
+                return partial(_touched_object, self.touched)
+        return super().find_class(module, name)
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Keeps the collector from running while pops are pickled and unpickled, as each of its full collections would walk
+    every object in the simulation, over and over, for the sake of the handful of cycles they make
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _run_jobs(jobs: list, pops: Dict[int, Population]) -> bytes:
+    """
+    Brings the worker's copy of each job's settlement up to date, runs its task, and pickles what the task changed
+    """
+    touched = []
+    outcomes = []
+    for settlement, year, birth_rate_modifier, is_earth, rng, settlement_state, pop_states, population, pop_count in jobs:
+        if settlement_state is not None:
+            settlement.__dict__.clear()
+            settlement.__dict__.update(settlement_state)
+        for pop, state in pop_states:
+            for name, value in state.items():
+                setattr(pop, name, value)
+            if settlement_state is None:
+                settlement.add_pop(pop)
+        if settlement._population != population or len(settlement.pops) != pop_count:
+            raise RuntimeError(f"The worker's copy of {settlement.name} is out of step with the simulation")
+
+        task = SettlementTask(settlement, year, birth_rate_modifier, is_earth, rng)
+        task_touched = task.touched()
+        before = [snapshot(obj) for obj in task_touched]
+        with METRICS.collect() as metrics:
+            result, events = task.run()
+        appended = set()
+        changes = []
+        for n, (obj, state) in enumerate(zip(task_touched, before)):
+            changed = changed_state(obj, state, appended)
+            if changed:
+                changes.append((n, changed))
+        touched.append(task_touched)
+        outcomes.append((len(task_touched), changes, result, events, dict(metrics)))
+
+    buffer = io.BytesIO()
+    ChangesPickler(buffer, pops, touched).dump(outcomes)
+    return buffer.getvalue()
+
+
+def _serve(connection: "Connection"):
+    """
+    Runs each year's jobs from the parent until it sends an empty message, keeping its copies of every settlement and pop
+    it has been sent from one year to the next
+    """
+    pops: Dict[int, Population] = {}
+    settlements: Dict[int, Settlement] = {}
+    while True:
+        message = connection.recv_bytes()
+        if not message:
+            break
+        try:
+            with paused_gc():
+                (event_level, collect_metrics, check_population_totals), jobs = TaskUnpickler(
+                    io.BytesIO(message), pops, settlements
+                ).load()
+                EVENT_BUS.level = event_level
+                METRICS.enabled = collect_metrics
+                constants.CHECK_POPULATION_TOTALS = check_population_totals
+                changes = _run_jobs(jobs, pops)
+            connection.send_bytes(b"\x00" + changes)
+        except Exception:
+            connection.send_bytes(b"\x01" + traceback.format_exc().encode())
+    connection.close()
+
+
+class SettlementPool:
+    """
+    Worker processes for running settlement tasks, kept alive from one year to the next
+
+    Every settlement is run by the same worker each year, which keeps its own copy of the settlement, its government
+    and its pops. So each year a worker is only sent its tasks' random streams and the pops that have arrived in their
+    settlements since, and it sends back only the attributes each task changed, and whatever it created, which are
+    applied to the simulation's own objects in task order. Pops and settlements are referred to by their uuid either
+    way, and a worker never holds more than the uuid of pops living elsewhere, as tasks only ever compare them to their
+    own. A settlement whose government or pops list was replaced outside its task is sent whole again.
+    """
+
+    workers: int
+    processes: List["BaseProcess"]
+    connections: List["Connection"]
+    # every pop either side has referred to, and every settlement given to a worker, by the int of their uuid
+    pops: Dict[int, Population]
+    settlements: Dict[int, Settlement]
+    # the worker running each settlement, and its pops list, how many pops it held and its government after its last task
+    placements: Dict[int, int]
+    synced: Dict[int, Tuple[List[Population], int, object]]
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.processes = []
+        self.connections = []
+        self.pops = {}
+        self.settlements = {}
+        self.placements = {}
+        self.synced = {}
+
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
+        # workers never read the simulation they're forked from, so keep the collector from copying its every page
+        gc.freeze()
+        try:
+            for _ in range(workers):
+                connection, worker_connection = context.Pipe()
+                process = context.Process(target=_serve, args=(worker_connection,), daemon=True)
+                process.start()
+                worker_connection.close()
+                self.processes.append(process)
+                self.connections.append(connection)
+        finally:
+            gc.unfreeze()
+
+    def place(self, tasks: List[SettlementTask]):
+        """
+        Gives each settlement that has no worker yet to the worker with the fewest pops, largest settlement first
+        """
+        loads = [0] * self.workers
+        new_settlements = []
+        for task in tasks:
+            settlement = task.settlement
+            worker = self.placements.get(settlement.uuid.int)
+            if worker is None:
+                new_settlements.append(settlement)
+            else:
+                loads[worker] += len(settlement.pops)
+        for settlement in sorted(new_settlements, key=lambda s: len(s.pops), reverse=True):
+            key = settlement.uuid.int
+            if self.settlements.setdefault(key, settlement) is not settlement:
+                raise ValueError(f"More than one settlement has the uuid {settlement.uuid}")
+            worker = loads.index(min(loads))
+            loads[worker] += len(settlement.pops)
+            self.placements[key] = worker
+
+    def job(self, task: SettlementTask) -> tuple:
+        """
+        :returns the task's job for its worker, with the whole settlement if the worker's copy is out of date, or
+            otherwise just the pops that have arrived since its last task
+        """
+        settlement = task.settlement
+        synced = self.synced.get(settlement.uuid.int)
+        if (
+            synced is not None
+            and synced[0] is settlement.pops
+            and synced[1] <= len(settlement.pops)
+            and synced[2] is settlement.government
+        ):
+            settlement_state = None
+            sent_pops = settlement.pops[synced[1]:]
+        else:
+            settlement_state = dict(settlement.__dict__)
+            # planets stay behind, and the settlement and its pops are given the task's random stream before they draw
+            settlement_state["planet"] = None
+            settlement_state["rng"] = None
+            sent_pops = task.touched()[2:]
+        pop_states = []
+        for pop in sent_pops:
+            state = object_state(pop)
+            state["rng"] = None
+            pop_states.append((pop, state))
+        return (
+            settlement,
+            task.year,
+            task.birth_rate_modifier,
+            task.is_earth,
+            task.rng,
+            settlement_state,
+            pop_states,
+            settlement._population,
+            len(settlement.pops),
+        )
+
+    def run(
+        self, tasks: List[SettlementTask], planets: List["InhabitedPlanet"]
+    ) -> List[Tuple[SettlementResult, List[Event]]]:
+        self.place(tasks)
+        settings = (EVENT_BUS.level, METRICS.enabled, constants.CHECK_POPULATION_TOTALS)
+        worker_tasks = [[] for _ in range(self.workers)]
+        for n, task in enumerate(tasks):
+            worker_tasks[self.placements[task.settlement.uuid.int]].append(n)
+
+        for connection, indexes in zip(self.connections, worker_tasks):
+            buffer = io.BytesIO()
+            TaskPickler(buffer, self.pops).dump((settings, [self.job(tasks[n]) for n in indexes]))
+            connection.send_bytes(buffer.getvalue())
+
+        outcomes = [None] * len(tasks)
+        for connection, indexes in zip(self.connections, worker_tasks):
+            message = connection.recv_bytes()
+            if message[:1] != b"\x00":
+                raise RuntimeError(f"A settlement worker failed:\n{message[1:].decode()}")
+            touched = [tasks[n].touched() for n in indexes]
+            changes = io.BytesIO(message)
+            changes.seek(1)
+            loaded = ChangesUnpickler(changes, self.pops, self.settlements, touched).load()
+            for n, task_touched, outcome in zip(indexes, touched, loaded):
+                outcomes[n] = task_touched, outcome
+
+        results = []
+        for task, (touched, (touched_count, changes, result, events, metrics)) in zip(tasks, outcomes):
+            settlement = task.settlement
+            if touched_count != len(touched):
+                raise RuntimeError(f"The worker's copy of {settlement.name} is out of step with the simulation")
+            METRICS.merge(metrics)
+            for n, state in changes:
+                obj = touched[n]
+                for name, value in state.items():
+                    if type(value) is Appended:
+                        getattr(obj, name).extend(value.items)
+                    else:
+                        setattr(obj, name, value)
+            self.synced[settlement.uuid.int] = (settlement.pops, len(settlement.pops), settlement.government)
+            results.append((result, events))
+        # settlements' totals were patched along with their pops, without passing the changes on to their planets
+        for planet in planets:
+            planet.recount_population()
+        return results
+
+    def close(self):
+        for connection in self.connections:
+            connection.send_bytes(b"")
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+
+def run_settlement_tasks(
+    tasks: List[SettlementTask], planets: List["InhabitedPlanet"], pool: Optional[SettlementPool] = None
+) -> List[Tuple[SettlementResult, List[Event]]]:
+    """
+    Runs every task, across the pool's workers if there is a pool and enough settlements to be worth sharing, and
+    applies their changes and metrics back onto the objects in this process in task order
+
+    :returns each task's results and events, in task order
+    """
+    if pool is None or len(tasks) < PARALLEL_MIN_SETTLEMENTS:
+        if pool is not None:
+            # the workers' copies miss whatever tasks run here change, so each settlement is sent whole next time
+            pool.synced.clear()
+        return [task.run() for task in tasks]
+    with paused_gc():
+        return pool.run(tasks, planets)
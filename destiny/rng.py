@@ -0,0 +1,44 @@
+from random import Random
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+from numpy.random import SeedSequence
+
+
+class RandomStreams:
+    """
+    Hierarchy of independent random streams derived from a single master seed
+
+    Every entity gets a fresh stream each year, keyed on (master seed, entity id, year), so what an entity draws never
+    depends on how many numbers anything processed before it happened to draw. Entities can be processed in any order,
+    or in parallel, and still give identical results.
+    """
+
+    seed: int
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else SeedSequence().entropy
+
+    def seed_sequence(self, entity: UUID, year: int) -> SeedSequence:
+        return SeedSequence(self.seed, spawn_key=(entity.int, year))
+
+    def stream(self, entity: UUID, year: int) -> Random:
+        """
+        :returns the entity's stream for the year as a Random, for the simulation's scalar draws
+        """
+        state = self.seed_sequence(entity, year).generate_state(4, np.uint64)
+        return Random(int.from_bytes(state.tobytes(), "little"))
+
+    def generator(self, entity: UUID, year: int) -> np.random.Generator:
+        """
+        :returns the entity's stream for the year as a counter-based Philox generator, for batched draws
+        """
+        return np.random.Generator(np.random.Philox(self.seed_sequence(entity, year)))
+
+
+def random_uuid(rng: Random) -> UUID:
+    """
+    A version 4 UUID drawn from rng rather than the OS, so that seeded runs create identical entities
+    """
+    return UUID(int=rng.getrandbits(128), version=4)
@@ -1,5 +1,4 @@
-from collections import defaultdict
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional, TextIO
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -7,6 +6,7 @@ from pydantic import BaseModel
 from destiny.cartography.star import Star as CartographyStar
 from destiny.cartography.planet import Planet as CartographyPlanet, LifeLevel
 from destiny.sociology.settlement import Settlement as SociologySettlement
+from destiny.transits import TransitLog
 
 class RGB(BaseModel):
     r: float
@@ -144,24 +144,9 @@ class TradeRoute(BaseModel):
     frequency_by_year: List[float]
 
     @classmethod
-    def serialise(cls, transits: List[List[Tuple[CartographyPlanet, CartographyPlanet]]]) -> List["TradeRoute"]:
-        routes = []
-        by_route = defaultdict(lambda: defaultdict(int))
-        transits_per_year = []
-        for year, year_transits in enumerate(transits):
-            transits_per_year.append(len(year_transits))
-            for start, end in year_transits:
-                by_route[(start.uuid, end.uuid)][year] += 1
-
-        for route, years in by_route.items():
-            start, end = route
-            routes.append(TradeRoute(
-                start=start,
-                end=end,
-                frequency_by_year=[years[n]/transits_per_year[n] for n in range(len(transits))]
-            ))
-
-        return routes
+    def serialise(cls, transits: TransitLog) -> Iterator["TradeRoute"]:
+        for start, end, frequencies in transits.route_frequencies():
+            yield TradeRoute(start=start, end=end, frequency_by_year=frequencies.tolist())
 
 
 class Starmap(BaseModel):
@@ -169,9 +154,32 @@ class Starmap(BaseModel):
     trade_routes: List[TradeRoute]
 
     @classmethod
-    def serialise(cls, starmap: List[CartographyStar], transits: List[List[Tuple[CartographyPlanet, CartographyPlanet]]]):
+    def serialise(cls, starmap: List[CartographyStar], transits: TransitLog):
         return Starmap(
             systems=[System.serialise(star) for star in starmap],
-            trade_routes=TradeRoute.serialise(transits)
+            trade_routes=list(TradeRoute.serialise(transits))
         )
 
+    @classmethod
+    def write_json(
+        cls,
+        file: TextIO,
+        starmap: List[CartographyStar],
+        transits: TransitLog,
+    ):
+        """
+        Writes the same JSON as Starmap.serialise(starmap, transits).model_dump_json(), one system or trade route at a
+        time, so that only a single record is ever held in memory beyond the transit log's per-route counts
+        """
+        file.write('{"systems":[')
+        for n, star in enumerate(starmap):
+            if n:
+                file.write(",")
+            file.write(System.serialise(star).model_dump_json())
+        file.write('],"trade_routes":[')
+        for n, route in enumerate(TradeRoute.serialise(transits)):
+            if n:
+                file.write(",")
+            file.write(route.model_dump_json())
+        file.write("]}")
+
@@ -1,44 +1,279 @@
+import gzip
+import os
 from random import Random
-from typing import List
+from typing import List, Optional, Tuple
 
 from destiny.cartography.mapping import load_stellar_catalogue
+from destiny.cartography.spatial import StarIndex
+from destiny.cartography.star import Star
+from destiny.checkpoint import read_checkpoint, write_checkpoint
+from destiny.events import EVENT_BUS, CheckpointSaved, RunResumed, YearStarted
+from destiny.metrics import METRICS
+from destiny.parallel import SettlementPool, SettlementTask, run_settlement_tasks
+from destiny.rng import RandomStreams
 from destiny.serialisation import Starmap
+from destiny.sociology.constants import EARTH_POPULATION_MULTIPLIER
+from destiny.sociology.inhabitedplanet import InhabitedPlanet
 from destiny.sociology.starships import Starship
+from destiny.sociology.utils.city_names import CITY_LIST
 from destiny.sociology.utils.loading import generate_earth_pops
+from destiny.sociology.utils.shipnames import SHIP_NAMES
+from destiny.transits import TransitLog
 
+# years between checkpoints when a checkpoint path is given
+CHECKPOINT_EVERY = 10
 
-def simulate(years: int = 250) -> Starmap:
-    rng = Random()
-    starmap = load_stellar_catalogue()
-    sol = starmap[0]
-    inhabited_planets = [generate_earth_pops(rng, earth=sol.planets[2])]
-    ships_in_flight: List[Starship] = []
-    transits = []
 
-    for n in range(years):
-        annual_transits = []
-        print(f"Year {n+1}")
+class Simulation:
+    """
+    The complete state of a simulation run, which can be saved to and resumed from a checkpoint
+
+    Checkpoints also capture the ship and city name pools, which are shared module-level lists that are consumed as the
+    simulation runs, so a resumed run continues exactly as the original would have.
+    """
+
+    streams: RandomStreams
+    rng: Random
+    starmap: List[Star]
+    inhabited_planets: List[InhabitedPlanet]
+    ships_in_flight: List[Starship]
+    transits: TransitLog
+    year: int
+    # worker processes for settlements' years, kept from one year to the next, and never checkpointed
+    pool: Optional[SettlementPool]
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        transit_spill_path: Optional[str] = None,
+        starmap: Optional[List[Star]] = None,
+        population_multiplier: float = EARTH_POPULATION_MULTIPLIER,
+    ):
+        """
+        :param starmap: an already loaded stellar catalogue to simulate on, which the simulation will modify
+        :param population_multiplier: the starting population of Earth relative to today's
+        """
+        self.streams = RandomStreams(seed)
+        self.rng = Random(self.streams.seed)
+        self.starmap = starmap if starmap is not None else load_stellar_catalogue()
+        sol = self.starmap[0]
+        self.inhabited_planets = [
+            generate_earth_pops(self.rng, population_multiplier, earth=sol.planets[2])
+        ]
+        self.ships_in_flight = []
+        self.transits = TransitLog(transit_spill_path)
+        self.year = 0
+        self.pool = None
+
+    def process_year(self, workers: int = 1):
+        """
+        Runs a year in two phases. First every settlement processes its own year, in parallel across workers if there
+        is more than one. Then, serially and in a fixed order, each planet's science, migration and shipping, which reach
+        beyond a single settlement. Every planet, settlement and arriving ship draws from its own stream for the year, so
+        results depend only on the seed, never on the number of workers.
+
+        With METRICS enabled, also records the year's row of phase timings and counts.
+        """
+        with METRICS.phase("year"):
+            self._process_year(workers)
+        if METRICS.enabled:
+            METRICS.count("inhabited_planets", len(self.inhabited_planets))
+            METRICS.count("settlements", sum(len(p.settlements) for p in self.inhabited_planets))
+            METRICS.count("pops", sum(len(s.pops) for p in self.inhabited_planets for s in p.settlements))
+            METRICS.count("population", sum(p.population for p in self.inhabited_planets))
+            METRICS.count("ships_in_flight", len(self.ships_in_flight))
+        METRICS.end_year(self.year - 1)
+
+    def _process_year(self, workers: int):
+        n = self.year
+        self.transits.new_year()
+        EVENT_BUS.emit(YearStarted(n))
         ships_still_in_flight = []
         ships_arrived = []
-        for ship in ships_in_flight:
-            if ship.transit():
-                ships_arrived.append(ship)
-            else:
-                ships_still_in_flight.append(ship)
-        ships_in_flight = ships_still_in_flight
-
-        for ship in ships_arrived:
-            maybe_new_planet = ship.offload(n)
-            if maybe_new_planet:
-                inhabited_planets.append(maybe_new_planet)
-
-        for planet in inhabited_planets:
-            ships = planet.process_year(n)
+        with METRICS.phase("transit"):
+            for ship in self.ships_in_flight:
+                ship.bind_rng(self.streams.stream(ship.uuid, n))
+                if ship.transit():
+                    ships_arrived.append(ship)
+                else:
+                    ships_still_in_flight.append(ship)
+        self.ships_in_flight = ships_still_in_flight
+        METRICS.count("ships_arrived", len(ships_arrived))
+
+        with METRICS.phase("offloading"):
+            for ship in ships_arrived:
+                maybe_new_planet = ship.offload(n)
+                if maybe_new_planet:
+                    self.inhabited_planets.append(maybe_new_planet)
+                    METRICS.count("planets_colonised")
+
+        headers = []
+        tasks = []
+        for planet in self.inhabited_planets:
+            planet.rng = self.streams.stream(planet.uuid, n)
+            with EVENT_BUS.capture() as header:
+                birth_rate_modifier = planet.start_year(n)
+            headers.append(header)
+            for settlement in planet.settlements:
+                tasks.append(
+                    SettlementTask(
+                        settlement,
+                        n,
+                        birth_rate_modifier,
+                        planet.is_earth,
+                        self.streams.stream(settlement.uuid, n),
+                    )
+                )
+
+        with METRICS.phase("settlements"):
+            outcomes = iter(run_settlement_tasks(tasks, self.inhabited_planets, self.settlement_pool(workers)))
+
+        for planet, header in zip(self.inhabited_planets, headers):
+            EVENT_BUS.replay(header)
+            settlement_results = []
+            for _ in planet.settlements:
+                result, events = next(outcomes)
+                EVENT_BUS.replay(events)
+                settlement_results.append(result)
+            ships = planet.finish_year(n, settlement_results)
             for ship in ships:
-                annual_transits.append((planet.planet, ship.destination))
-            ships_in_flight += ships
+                self.transits.record(planet.planet, ship.destination)
+            self.ships_in_flight += ships
+            METRICS.count("ships_launched", len(ships))
+
+        self.year += 1
+
+    def run(
+        self,
+        years: int,
+        checkpoint: Optional[str] = None,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        workers: int = 1,
+    ):
+        """
+        Runs the simulation until it has simulated the given number of years in total
+
+        :param checkpoint: the path to periodically save the simulation to, if any
+        :param workers: the number of processes to run settlements' years in
+        """
+        try:
+            while self.year < years:
+                self.process_year(workers)
+                if checkpoint and self.year % checkpoint_every == 0 and self.year < years:
+                    self.save(checkpoint)
+        finally:
+            self.close()
+
+    def settlement_pool(self, workers: int) -> Optional[SettlementPool]:
+        """
+        :returns the pool of workers to run settlements' years in, started the first time it's needed, or None to run
+            them in this process
+        """
+        if workers <= 1:
+            return None
+        if self.pool is not None and self.pool.workers != workers:
+            self.close()
+        if self.pool is None:
+            self.pool = SettlementPool(workers)
+        return self.pool
+
+    def close(self):
+        """
+        Stops the simulation's worker processes, if it has any. They're started again if another year needs them.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["pool"]
+        star_indexes = {id(star): n for n, star in enumerate(self.starmap)}
+        state["neighbours"] = [
+            [(star_indexes[id(other)], distance) for other, distance in star.precomputed_neighbours]
+            for star in self.starmap
+        ]
+        state["spatially_indexed"] = [
+            n for n, star in enumerate(self.starmap) if star.spatial_index is not None
+        ]
+        state["ship_names"] = list(SHIP_NAMES)
+        state["city_list"] = CITY_LIST
+        return state
+
+    def __setstate__(self, state):
+        neighbours = state.pop("neighbours")
+        spatially_indexed = state.pop("spatially_indexed")
+        ship_names = state.pop("ship_names")
+        city_list = state.pop("city_list")
+        self.__dict__.update(state)
+        self.pool = None
+
+        for star, star_neighbours in zip(self.starmap, neighbours):
+            star.precomputed_neighbours = [
+                (self.starmap[index], distance) for index, distance in star_neighbours
+            ]
+        indexed_stars = [self.starmap[n] for n in spatially_indexed]
+        spatial_index = StarIndex(indexed_stars)
+        for star in indexed_stars:
+            star.spatial_index = spatial_index
+
+        SHIP_NAMES[:] = ship_names
+        CITY_LIST.clear()
+        CITY_LIST.update(city_list)
+
+    def save(self, path: str):
+        """
+        Writes a checkpoint of the simulation, gzip compressed if path ends in .gz
+        """
+        partial_path = f"{path}.{os.getpid()}.tmp"
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(partial_path, "wb") as checkpoint_file:
+            write_checkpoint(checkpoint_file, self)
+        os.replace(partial_path, path)
+        EVENT_BUS.emit(CheckpointSaved(self.year, path))
+
+    @classmethod
+    def load(cls, path: str) -> "Simulation":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as checkpoint_file:
+            return read_checkpoint(checkpoint_file)
+
+
+def run(
+    years: int = 250,
+    seed: Optional[int] = None,
+    checkpoint: Optional[str] = None,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    workers: int = 1,
+) -> Tuple[List[Star], TransitLog]:
+    """
+    :param checkpoint: the path to periodically save the simulation to, if any, for resume_from
+    :param workers: the number of processes to run settlements' years in, which doesn't change the results
+    :returns every star in the catalogue and the transits started in each year
+    """
+    simulation = Simulation(seed)
+    simulation.run(years, checkpoint, checkpoint_every, workers)
+    return simulation.starmap, simulation.transits
+
+
+def resume_from(
+    checkpoint: str,
+    years: int = 250,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    workers: int = 1,
+) -> Tuple[List[Star], TransitLog]:
+    """
+    Continues a run from its last checkpoint, producing the same results as if it had never been interrupted
+
+    :returns every star in the catalogue and the transits started in each year
+    """
+    simulation = Simulation.load(checkpoint)
+    EVENT_BUS.emit(RunResumed(simulation.year, checkpoint))
+    simulation.run(years, checkpoint, checkpoint_every, workers)
+    return simulation.starmap, simulation.transits
 
-        transits.append(annual_transits)
 
+def simulate(years: int = 250, seed: Optional[int] = None, workers: int = 1) -> Starmap:
+    starmap, transits = run(years, seed, workers=workers)
     print("Serialising data")
     return Starmap.serialise(starmap, transits)
@@ -0,0 +1,106 @@
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from uuid import UUID
+
+from destiny.cartography.spatial import RANGE_BUCKET
+
+if TYPE_CHECKING:
+    from destiny.cartography.planet import Planet
+    from destiny.cartography.star import Star
+    from destiny.sociology.inhabitedplanet import InhabitedPlanet
+
+
+class ColonisationTargets:
+    """
+    Every habitable planet around the stars within a range bucket of one star, split into free and inhabited planets
+
+    The candidates are static, ordered by distance then by their position in their star's planet list. Only the split
+    needs rebuilding, and only when one of the candidates is settled.
+    """
+
+    candidates: List[Tuple[float, "Planet"]]
+    free: List[Tuple[float, "Planet"]]
+    free_distances: List[float]
+    inhabited: List[Tuple[float, "InhabitedPlanet"]]
+    inhabited_distances: List[float]
+
+    def __init__(self, candidates: List[Tuple[float, "Planet"]]):
+        self.candidates = candidates
+        self.refresh()
+
+    def refresh(self):
+        self.free = []
+        self.inhabited = []
+        for distance, planet in self.candidates:
+            if planet.inhabited is None:
+                self.free.append((distance, planet))
+            else:
+                self.inhabited.append((distance, planet.inhabited))
+        self.free_distances = [distance for distance, _ in self.free]
+        self.inhabited_distances = [distance for distance, _ in self.inhabited]
+
+
+class ColonisationRegistry:
+    """
+    Shared index of the free and inhabited habitable planets reachable from each star
+
+    Targets are computed lazily per star and range bucket, then kept up to date as planets are settled, so inhabited
+    planets don't need to rescan their neighbourhood every year.
+    """
+
+    _targets: Dict[Tuple[UUID, int], ColonisationTargets]
+    _targets_by_planet: Dict[UUID, List[ColonisationTargets]]
+
+    def __init__(self):
+        self._targets = {}
+        self._targets_by_planet = defaultdict(list)
+
+    def __reduce__(self):
+        # targets are rebuilt on demand from the planets themselves, so there is no need to pickle them
+        return ColonisationRegistry, ()
+
+    def _targets_for(self, star: "Star", distance: float) -> ColonisationTargets:
+        bucket = max(math.ceil(distance / RANGE_BUCKET), 1)
+        key = (star.uuid, bucket)
+        if key not in self._targets:
+            candidates = [
+                (star_distance, planet)
+                for other, star_distance in star.neighbours_within(bucket * RANGE_BUCKET)
+                for planet in other.habitable_planets
+            ]
+            targets = ColonisationTargets(candidates)
+            self._targets[key] = targets
+            for _, planet in candidates:
+                self._targets_by_planet[planet.uuid].append(targets)
+        return self._targets[key]
+
+    def register(self, inhabited_planet: "InhabitedPlanet"):
+        """
+        Must be called once a planet has been settled so it moves from the free to the inhabited targets
+        """
+        for targets in self._targets_by_planet.get(inhabited_planet.planet.uuid, []):
+            targets.refresh()
+
+    def free_planets_within(
+        self, star: "Star", distance: float
+    ) -> List[Tuple[float, "Planet"]]:
+        """
+        :returns the unsettled habitable planets around other stars within distance ly of star, nearest first
+        """
+        if distance < 0:
+            return []
+        targets = self._targets_for(star, distance)
+        return targets.free[: bisect_right(targets.free_distances, distance)]
+
+    def inhabited_planets_within(
+        self, star: "Star", distance: float
+    ) -> List[Tuple[float, "InhabitedPlanet"]]:
+        """
+        :returns the inhabited planets around other stars within distance ly of star, nearest first
+        """
+        if distance < 0:
+            return []
+        targets = self._targets_for(star, distance)
+        return targets.inhabited[: bisect_right(targets.inhabited_distances, distance)]
@@ -2,3 +2,12 @@ POP_TARGET_SIZE = 50_000
 SPEED_OF_LIGHT = 299_792_458
 SECONDS_PER_YEAR = 31_536_000
 LIGHTYEAR_METRES = 9.461 * (10 ** 15)
+
+# the starting population of Earth relative to today's
+EARTH_POPULATION_MULTIPLIER = 10.0 / 8
+
+# cross-check the incrementally maintained settlement and planet population totals against full recounts on every read
+CHECK_POPULATION_TOTALS = False
+
+# run births and deaths through the statistically equivalent, array-backed PopulationStore instead of per pop
+VECTORISED_BIRTHS_AND_DEATHS = False
@@ -1,9 +1,19 @@
 import math
-from collections import defaultdict, Counter
+from collections import defaultdict
+from itertools import compress
 from random import Random
 from typing import List, Optional, TYPE_CHECKING, Type, Union
 
+from destiny.events import (
+    EVENT_BUS,
+    CouncilShifted,
+    DictatorSucceeded,
+    GovernmentChanged,
+    GovernmentShifted,
+    PartyElected,
+)
 from destiny.sociology.constants import POP_TARGET_SIZE
+from destiny.sociology.utils.elections import tally_votes
 
 if TYPE_CHECKING:
     from destiny.sociology.pop import Population
@@ -22,9 +32,9 @@ class Government:
         pass
 
     def govern(self, settlement: "Settlement", year: int) -> Optional["Government"]:
-        for pop in settlement.pops:
+        for pop, suitable in zip(settlement.pops, settlement.suitability(self).tolist()):
             gov_happiness_delta = (1 - pop.tolerance) / 10
-            if not self.suitable_for(pop):
+            if not suitable:
                 pop.happiness -= gov_happiness_delta
             else:
                 pop.happiness += gov_happiness_delta
@@ -125,24 +135,26 @@ class Dictatorship(Government):
 
     def __init__(self, settlement: "Settlement"):
         super(Dictatorship, self).__init__(settlement)
-        self.dictator = settlement.rng.choice(settlement.pops)
-        self.dictator.mergeable = False
+        self.appoint_dictator(settlement.rng.choice(settlement.pops))
         self.infer_opinion()
 
+    def appoint_dictator(self, dictator: "Population"):
+        # the dictator is never merged away or allowed to emigrate, so the government only ever holds its own pops
+        dictator.mergeable = False
+        self.dictator = dictator
+
     def choose_new_dictator(self, settlement: "Settlement"):
-        candidates = [pop for pop in settlement.pops if self.suitable_for(pop)]
+        candidates = list(compress(settlement.pops, settlement.suitability(self).tolist()))
         if not candidates:
             candidates = settlement.pops
-        self.dictator = settlement.rng.choice(candidates)
+        self.appoint_dictator(settlement.rng.choice(candidates))
         self.infer_opinion()
 
     def govern(self, settlement: "Settlement", year: int) -> Optional["Government"]:
         if self.dictator.is_dead:
             self.choose_new_dictator(settlement)
             self.infer_opinion()
-            print(
-                f"The dictator of {settlement.name} has died. A new {self.philosophy} dictator has taken control"
-            )
+            EVENT_BUS.emit(DictatorSucceeded(settlement.name, self.philosophy))
             overthrow = is_population_going_to_overthrow_government(self, settlement)
             if overthrow is None:
                 for pop in settlement.pops:
@@ -157,15 +169,30 @@ class HereditaryDictatorship(Dictatorship):
     name = "hereditary dictatorship"
 
     def choose_new_dictator(self, settlement: "Settlement"):
-        candidates = self.dictator.descendent_pops
+        candidates = resident_descendents([self.dictator], settlement)
         if not candidates:
-            candidates = [pop for pop in settlement.pops if self.suitable_for(pop)]
+            candidates = list(compress(settlement.pops, settlement.suitability(self).tolist()))
         if not candidates:
             candidates = settlement.pops
-        self.dictator = settlement.rng.choice(candidates)
+        self.appoint_dictator(settlement.rng.choice(candidates))
         self.infer_opinion()
 
 
+def resident_descendents(
+    pops: List["Population"], settlement: "Settlement"
+) -> List["Population"]:
+    """
+    :returns the descendents of pops who still live in the settlement, in order, without duplicates. Settlements only
+        ever look at their own pops, which lets each settlement's year be processed independently.
+    """
+    residents = set(settlement.pops)
+    return [
+        pop
+        for pop in dict.fromkeys(sum((p.descendent_pops for p in pops), start=[]))
+        if pop in residents
+    ]
+
+
 def average_opinion(government: Government, pops: List["Population"]):
     government.autocratic_democratic = sum(
         (p.autocratic_democratic for p in pops)
@@ -205,7 +232,7 @@ class Autocracy(Government):
         self.infer_opinion()
 
     def select_council_members(self, settlement: "Settlement", council_size: int):
-        candidates = [pop for pop in settlement.pops if self.suitable_for(pop)]
+        candidates = list(compress(settlement.pops, settlement.suitability(self).tolist()))
         required = council_size - len(self.council)
         if required <= 0:
             new_councilors = []
@@ -216,6 +243,7 @@ class Autocracy(Government):
         return new_councilors
 
     def appoint_councilors(self, new_councilors: List["Population"]):
+        # councilors are never merged away or allowed to emigrate, so the council only ever holds the settlement's pops
         for councilor in new_councilors:
             councilor.mergeable = False
             self.council.append(councilor)
@@ -240,9 +268,7 @@ class Autocracy(Government):
         old_philosophy = self.philosophy
         self.elect_council_members(settlement)
         if old_philosophy != self.philosophy:
-            print(
-                f"The government of {settlement.name} has shifted away from {old_philosophy} towards {self.philosophy}"
-            )
+            EVENT_BUS.emit(CouncilShifted(settlement.name, self.name, old_philosophy, self.philosophy))
         super(Autocracy, self).govern(settlement, year)
         return is_population_going_to_overthrow_government(self, settlement)
 
@@ -254,9 +280,7 @@ class HereditaryAutocracy(Autocracy):
         council_size = self.council_size(settlement)
 
         pre_housekeeping_council_size = len(self.council)
-        replacement_candidates = list(
-            set(sum((p.descendent_pops for p in self.council), start=[]))
-        )
+        replacement_candidates = resident_descendents(self.council, settlement)
 
         self.housekeeping(settlement)
 
@@ -299,9 +323,7 @@ class RepresentativeDemocracy(Government):
             old_philosophy = self.philosophy
             self.elect_council_members(settlement)
             if old_philosophy != self.philosophy:
-                print(
-                    f"{settlement.name} has voted out its {old_philosophy} government and elected a new {self.philosophy} party"
-                )
+                EVENT_BUS.emit(PartyElected(settlement.name, self.name, old_philosophy, self.philosophy))
         super(RepresentativeDemocracy, self).govern(settlement, year)
 
         return is_government_going_to_become_autocracy(self, settlement)
@@ -340,44 +362,32 @@ class RepresentativeDemocracy(Government):
         num_candidates = min(len(candidate_candidates), council_size * 3)
         candidates = settlement.rng.sample(candidate_candidates, num_candidates)
 
-        candidates_by_opinion = defaultdict(list)
-        for candidate in candidates:
-            candidates_by_opinion[candidate.opinion_hash].append(candidate)
-
-        votes = Counter()
-
         voting_threshold = settlement.rng.random() * 0.5
-        voters = (
+        # pops compare equal by uuid
+        candidate_uuids = {candidate.uuid for candidate in candidates}
+        voters = [
             pop
             for pop in settlement.pops
-            if pop not in candidates and pop.political_engagement >= voting_threshold
-        )
-        for voter in voters:
-            voter_opinion = voter.opinion_hash
-            choices = candidates_by_opinion[voter_opinion]
-            if len(choices) < council_size:
-                # presort somehow?
-                choices = candidates
-            ranked_choices = sorted(choices, key=lambda pop: pop.similarity_to(voter))
-            for candidate in ranked_choices[:council_size]:
-                votes[candidate] += 1
-
-        winners = votes.most_common(council_size)
+            if pop.uuid not in candidate_uuids and pop.political_engagement >= voting_threshold
+        ]
+        winners = tally_votes(voters, candidates, council_size)
 
         if winners:
             for winner, _ in winners:
-                winner.mergable = False
+                winner.mergeable = False
                 self.council.append(winner)
         else:
             if council_size > len(candidates):
                 self.council = candidates
             else:
                 self.council = settlement.rng.sample(candidates, council_size)
+            for councilor in self.council:
+                councilor.mergeable = False
 
         self.infer_opinions()
 
-        for pop in settlement.pops:
-            if self.suitable_for(pop):
+        for pop, suitable in zip(settlement.pops, settlement.suitability(self).tolist()):
+            if suitable:
                 pop.happiness += 0.5
             else:
                 pop.happiness += 0.2
@@ -401,9 +411,7 @@ class DirectDemocracy(Government):
         old_philosophy = self.philosophy
         self.infer_opinions(settlement)
         if self.philosophy != old_philosophy:
-            print(
-                f"{settlement.name}'s {self.name} has shifted from {old_philosophy} towards {self.philosophy}"
-            )
+            EVENT_BUS.emit(GovernmentShifted(settlement.name, self.name, old_philosophy, self.philosophy))
         super(DirectDemocracy, self).govern(settlement, year)
         return is_government_going_to_become_autocracy(self, settlement)
 
@@ -435,17 +443,18 @@ def establish_new_government(
         if TYPE_CHECKING:
             assert isinstance(government, Autocracy)
         if len(inner_circle) >= len(government.council):
-            government.council = settlement.rng.sample(
-                inner_circle, len(government.council)
-            )
+            councilors = settlement.rng.sample(inner_circle, len(government.council))
+            government.council = []
+            government.appoint_councilors(councilors)
         else:
-            government.council = inner_circle
+            government.council = []
+            government.appoint_councilors(inner_circle)
             government.elect_council_members(settlement)
         government.infer_opinion()
     elif issubclass(government_type, Dictatorship):
         if TYPE_CHECKING:
             assert isinstance(government, Dictatorship)
-        government.dictator = settlement.rng.choice(inner_circle)
+        government.appoint_dictator(settlement.rng.choice(inner_circle))
         government.infer_opinion()
     return government
 
@@ -457,8 +466,8 @@ def is_population_going_to_overthrow_government(
     unhappy_pops = []
     loyal_pops = []
     rebel_pops = []
-    for pop in settlement.pops:
-        suitable_for = government.suitable_for(pop) and pop.happiness < 0.1
+    for pop, suitable in zip(settlement.pops, settlement.suitability(government).tolist()):
+        suitable_for = suitable and pop.happiness < 0.1
         if not suitable_for and pop.political_engagement > 0.75:
             unhappy_pops.append(pop)
             if pop.pacifist_militaristic >= 0.75:
@@ -476,8 +485,15 @@ def is_population_going_to_overthrow_government(
         new_government = establish_new_government(
             new_government_type, settlement, unhappy_pops
         )
-        print(
-            f"{settlement.name} have revolted against its {government.philosophy} {government.name} and formed a new {new_government.philosophy} {new_government.name}"
+        EVENT_BUS.emit(
+            GovernmentChanged(
+                settlement.name,
+                "revolt",
+                government.name,
+                government.philosophy,
+                new_government.name,
+                new_government.philosophy,
+            )
         )
         return new_government
     if len(rebel_pops) >= len(loyal_pops) * 3:
@@ -487,8 +503,15 @@ def is_population_going_to_overthrow_government(
         new_government = establish_new_government(
             new_government_type, settlement, rebel_pops
         )
-        print(
-            f"{settlement.name} has violently overthrown its {government.philosophy} {government.name} and formed a new {new_government.philosophy} {new_government.name}"
+        EVENT_BUS.emit(
+            GovernmentChanged(
+                settlement.name,
+                "violent overthrow",
+                government.name,
+                government.philosophy,
+                new_government.name,
+                new_government.philosophy,
+            )
         )
         return new_government
 
@@ -502,8 +525,7 @@ def is_government_going_to_become_autocracy(
     unhappy_pops = []
     loyal_pops = []
     rebel_pops = []
-    for pop in settlement.pops:
-        suitable_for = government.suitable_for(pop)
+    for pop, suitable_for in zip(settlement.pops, settlement.suitability(government).tolist()):
         if not suitable_for and (pop.political_engagement > 0.75 or pop.happiness < 0.1):
             unhappy_pops.append(pop)
             if pop.pacifist_militaristic >= 0.75 and pop.autocratic_democratic < 0.25:
@@ -531,8 +553,15 @@ def is_government_going_to_become_autocracy(
         new_government = establish_new_government(
             new_government_type, settlement, loyal_pops
         )
-        print(
-            f"The leading party in {settlement.name} has overthrown its {government.philosophy} {government.name} and formed a new {new_government.philosophy} {new_government.name}"
+        EVENT_BUS.emit(
+            GovernmentChanged(
+                settlement.name,
+                "party coup",
+                government.name,
+                government.philosophy,
+                new_government.name,
+                new_government.philosophy,
+            )
         )
         return new_government
     if len(rebel_pops) > (len(loyal_pops) * 3):
@@ -542,8 +571,15 @@ def is_government_going_to_become_autocracy(
         new_government = establish_new_government(
             new_government_type, settlement, unhappy_pops
         )
-        print(
-            f"Violent autocrats in {settlement.name} have overthrown its {government.philosophy} {government.name} and formed a new {new_government.philosophy} {new_government.name}"
+        EVENT_BUS.emit(
+            GovernmentChanged(
+                settlement.name,
+                "autocrat coup",
+                government.name,
+                government.philosophy,
+                new_government.name,
+                new_government.philosophy,
+            )
         )
         return new_government
     if len(unhappy_pops) > (len(loyal_pops) * 5):
@@ -553,8 +589,15 @@ def is_government_going_to_become_autocracy(
         new_government = establish_new_government(
             new_government_type, settlement, unhappy_pops
         )
-        print(
-            f"{settlement.name} has overthrown its {government.philosophy} {government.name} and formed a new {new_government.philosophy} {new_government.name}"
+        EVENT_BUS.emit(
+            GovernmentChanged(
+                settlement.name,
+                "overthrow",
+                government.name,
+                government.philosophy,
+                new_government.name,
+                new_government.philosophy,
+            )
         )
         return new_government
     return None
@@ -1,12 +1,20 @@
 from collections import defaultdict, Counter
 from random import Random
 from typing import List, Optional, Tuple, TYPE_CHECKING
-from uuid import uuid4, UUID
+from uuid import UUID
+
+import numpy as np
 
 from destiny.cartography.planet import Planet
+from destiny.events import EVENT_BUS, Level, MigrationSummary, MigrationWanted, PlanetStatus, ScienceUnlocked, StateFounded
+from destiny.metrics import METRICS
+from destiny.rng import random_uuid
+from destiny.sociology.colonisation import ColonisationRegistry
 from destiny.sociology.science import ScienceNode, TECH_TREE
-from destiny.sociology.settlement import Settlement
+from destiny.sociology import constants
+from destiny.sociology.settlement import Settlement, check_population_total
 from destiny.sociology.starships import Starship
+from destiny.sociology.utils.opinions import GovernmentIndex
 from destiny.sociology.utils.shipnames import SHIP_NAMES
 
 if TYPE_CHECKING:
@@ -24,21 +32,35 @@ class InhabitedPlanet:
     planet: Planet
     name: str
     discoveries: List[ScienceNode]
+    registry: ColonisationRegistry
 
     is_earth: bool
     population_by_year: List[int]
+    # the sum of the settlements' populations, kept up to date by the settlements
+    _population: float
 
     uuid: UUID
 
-    def __init__(self, rng: Random, planet: Planet, name: str, founding_year: int):
+    def __init__(
+        self,
+        rng: Random,
+        planet: Planet,
+        name: str,
+        founding_year: int,
+        registry: Optional[ColonisationRegistry] = None,
+    ):
         self.settlements = []
+        self._population = 0
         self.rng = rng
         self.planet = planet
         self.planet.inhabited = self
         self.name = name
         self.founding_year = founding_year
 
-        self.uuid = uuid4()
+        self.uuid = random_uuid(rng)
+
+        self.registry = registry if registry is not None else ColonisationRegistry()
+        self.registry.register(self)
 
         self.science_level = 0
         self.manufacturing_base = 1
@@ -71,11 +93,13 @@ class InhabitedPlanet:
 
             choice = self.rng.choice(options)
             self.discoveries.append(choice)
-            print(
-                f"{self.name} has upgraded to science level {self.science_level} and unlocked {choice}"
-            )
+            EVENT_BUS.emit(ScienceUnlocked(self.name, self.science_level, choice))
 
     def build_ships(self, year: int, capacity_needed: int):
+        with METRICS.phase("ship_building"):
+            self._build_ships(year, capacity_needed)
+
+    def _build_ships(self, year: int, capacity_needed: int):
         capacity_purchased = 0
         while capacity_purchased < capacity_needed:
             ship_name = self.rng.choice(SHIP_NAMES)
@@ -88,6 +112,7 @@ class InhabitedPlanet:
             capacity_purchased += ship_template.capacity
             self.manufacturing_surplus -= cost
             self.planet.ships.append(ship_template)
+            METRICS.count("ships_built")
             SHIP_NAMES.remove(ship_name)
             original, *numbers = ship_name.split("—")
             if numbers:
@@ -99,58 +124,104 @@ class InhabitedPlanet:
 
     @property
     def population(self):
-        return sum([s.population for s in self.settlements])
-
-    def process_year(self, year: int) -> List[Starship]:
-        planet_year = year - self.founding_year
-        if planet_year == year:
-            print(f"Processing year {year+1} for {self.name}")
-        else:
-            print(f"Processing year {year+1} (MY {planet_year+1}) for {self.name}")
-        print(f"Population: {self.population:,} in {sum(len(s.pops) for s in self.settlements)} pops across {len(self.settlements)} states")
+        if constants.CHECK_POPULATION_TOTALS:
+            check_population_total(self._population, sum([s.population for s in self.settlements]), self.name)
+        return self._population
+
+    def adjust_population(self, change: float):
+        self._population += change
+
+    def recount_population(self):
+        """
+        Recounts the total from every settlement's total, for when settlements have changed without telling the planet
+        """
+        self._population = sum([s.population for s in self.settlements])
+
+    def add_settlement(self, settlement: Settlement):
+        settlement.planet = self
+        self.settlements.append(settlement)
+        self._population += settlement.population
+
+    def start_year(self, year: int) -> float:
+        """
+        :returns the birth rate modifier for every settlement on the planet this year
+        """
+        if EVENT_BUS.wants(Level.DEBUG):
+            EVENT_BUS.emit(
+                PlanetStatus(
+                    year,
+                    self.name,
+                    self.founding_year,
+                    self.population,
+                    sum(len(s.pops) for s in self.settlements),
+                    len(self.settlements),
+                )
+            )
 
-        population_birth_rate_modifier = 1/max(self.population / 7_000_000_000, 1)
+        return 1/max(self.population / 7_000_000_000, 1)
 
+    def process_year(self, year: int) -> List[Starship]:
+        population_birth_rate_modifier = self.start_year(year)
+        settlement_results = [
+            settlement.process_year(year, population_birth_rate_modifier, self.is_earth)
+            for settlement in self.settlements
+        ]
+        return self.finish_year(year, settlement_results)
+
+    def finish_year(
+        self,
+        year: int,
+        settlement_results: List[
+            Tuple[List[Tuple[Settlement, "Population"]], int, int, float]
+        ],
+    ) -> List[Starship]:
+        """
+        Runs everything in a year that reaches beyond a single settlement: science, manufacturing, migration and
+        shipping, given the results of each settlement's Settlement.process_year
+
+        :returns the ships that have left the planet
+        """
         unhappy_pops = []
         settlements_by_government = defaultdict(list)
-        for settlement in self.settlements:
-            (
+        with METRICS.phase("science"):
+            for settlement, (
                 new_unhappy_pops,
                 manufacturing_output,
                 science_output,
                 average_happiness
-            ) = settlement.process_year(year, population_birth_rate_modifier, self.is_earth)
-            unhappy_pops += new_unhappy_pops
-            self.science_surplus += science_output * average_happiness
-            self.science_upgrade()
+            ) in zip(self.settlements, settlement_results):
+                unhappy_pops += new_unhappy_pops
+                self.science_surplus += science_output * average_happiness
+                self.science_upgrade()
 
-            self.manufacturing_surplus += self.manufacturing_base * manufacturing_output
+                self.manufacturing_surplus += self.manufacturing_base * manufacturing_output
 
-            settlements_by_government[settlement.government.opinion_hash].append(
-                settlement
-            )
+                settlements_by_government[settlement.government.opinion_hash].append(
+                    settlement
+                )
 
         self.population_by_year.append(self.population)
 
-        print(f"{len(unhappy_pops)} pops want to move")
-        leaving_ships, remaining_ships = self.migrate_pops(unhappy_pops, settlements_by_government, year)
+        EVENT_BUS.emit(MigrationWanted(self.name, len(unhappy_pops)))
+        METRICS.count("pops_wanting_to_move", len(unhappy_pops))
+        with METRICS.phase("migration"):
+            leaving_ships, remaining_ships = self.migrate_pops(unhappy_pops, settlements_by_government, year)
 
         self.planet.ships = []
-        for ship in remaining_ships:
-            candidates = []
-            candidate_weightings = []
-            for star, distance in self.planet.star.precomputed_neighbours:
-                if distance > ship.range:
-                    break
-                for planet in star.habitable_planets:
-                    if planet.inhabited:
-                        candidates.append(planet.inhabited)
-                        candidate_weightings.append(planet.inhabited.population / distance)
-            if not candidates:
-                self.planet.ships.append(ship)
-                continue
-            destination, = self.rng.choices(candidates, weights=candidate_weightings)
-            ship.travel_to(self, inhabited=destination)
+        with METRICS.phase("routing"):
+            for ship in remaining_ships:
+                candidates = []
+                candidate_weightings = []
+                for distance, inhabited in self.registry.inhabited_planets_within(
+                    self.planet.star, ship.range
+                ):
+                    candidates.append(inhabited)
+                    candidate_weightings.append(inhabited.population / distance)
+                if not candidates:
+                    self.planet.ships.append(ship)
+                    continue
+                destination, = self.rng.choices(candidates, weights=candidate_weightings)
+                ship.travel_to(self, inhabited=destination)
 
         return leaving_ships
 
@@ -175,7 +246,7 @@ class InhabitedPlanet:
             opinion = pop.opinion_hash
             for candidate in settlements_by_government[opinion]:
                 if candidate.government.suitable_for(pop):
-                    candidate.pops.append(pop)
+                    candidate.add_pop(pop)
                     moved += 1
                     break
             else:
@@ -190,18 +261,9 @@ class InhabitedPlanet:
         leaving_ships = []
         if random_ships and colonists:
             max_range = max(ship.range for ship in random_ships)
-            possible_destination_stars = []
-            for star, distance in self.planet.star.precomputed_neighbours:
-                if distance <= max_range:
-                    possible_destination_stars.append((distance, star))
-                else:
-                    break
-
-            colonisable_planets = []
-            for distance, star in possible_destination_stars:
-                for planet in star.habitable_planets:
-                    if planet.inhabited is None:
-                        colonisable_planets.append((distance, planet))
+            colonisable_planets = self.registry.free_planets_within(
+                self.planet.star, max_range
+            )
 
             if colonisable_planets:
                 # TODO: Pick colonisation targets better
@@ -243,29 +305,28 @@ class InhabitedPlanet:
         if random_ships and offworld_settlers:
             new_max_range = max(ship.range for ship in random_ships)
 
-            settleable_planets = []
             settlers_for_planet = defaultdict(list)
             planet_for_settlers = defaultdict(list)
-            for star, distance in self.planet.star.precomputed_neighbours:
-                if distance > new_max_range:
-                    break
-                for planet in star.habitable_planets:
-                    if planet.inhabited:
-                        chosen = False
-                        for original_settlement, settler in offworld_settlers:
-                            if any(
-                                    settlement.government.suitable_for(settler)
-                                    for settlement in planet.inhabited.settlements
-                            ):
-                                settlers_for_planet[planet.inhabited].append(
-                                    (original_settlement, settler)
-                                )
-                                planet_for_settlers[
-                                    (original_settlement, settler)
-                                ].append(planet.inhabited)
-                                chosen = True
-                        if chosen:
-                            settleable_planets.append((distance, planet.inhabited))
+            reachable_planets = self.registry.inhabited_planets_within(
+                self.planet.star, new_max_range
+            )
+            # the position in reachable_planets of the planet each settlement is on
+            settlement_planets = np.array(
+                [n for n, (_, inhabited) in enumerate(reachable_planets) for _ in inhabited.settlements],
+                dtype=np.int64,
+            )
+            governments = GovernmentIndex(
+                [settlement.government for _, inhabited in reachable_planets for settlement in inhabited.settlements]
+            )
+            suitable_governments = governments.suitable_for([settler for _, settler in offworld_settlers])
+            for settlement_settler, suitable in zip(offworld_settlers, suitable_governments):
+                for n in np.unique(settlement_planets[suitable]).tolist():
+                    inhabited = reachable_planets[n][1]
+                    settlers_for_planet[inhabited].append(settlement_settler)
+                    planet_for_settlers[settlement_settler].append(inhabited)
+            settleable_planets = [
+                (distance, inhabited) for distance, inhabited in reachable_planets if inhabited in settlers_for_planet
+            ]
 
             while offworld_settlers and random_ships and settleable_planets:
                 settleable_planets = sorted(
@@ -309,7 +370,7 @@ class InhabitedPlanet:
         if offworld_settlers:
             if self.is_earth:
                 for original_settlement, pop in offworld_settlers:
-                    original_settlement.pops.append(pop)
+                    original_settlement.add_pop(pop)
                     stayed += 1
             else:
                 stayed += len(offworld_settlers)
@@ -338,19 +399,16 @@ class InhabitedPlanet:
                             returners.append((settlement, failed_instigator))
 
                         new_settlement = Settlement.for_pops(self.rng, new_population, founding_year=year)
-                        print(
-                            f"{len(new_population)} pops have formed a new state of {new_settlement.name} on {self.name}")
-                        self.settlements.append(new_settlement)
+                        EVENT_BUS.emit(StateFounded(self.name, new_settlement.name, len(new_population)))
+                        self.add_settlement(new_settlement)
                     else:
                         returners = offworld_settlers
                 else:
                     returners = offworld_settlers
 
                 for settlement, pop in returners:
-                    settlement.pops.append(pop)
+                    settlement.add_pop(pop)
 
-        print(
-            f"Moved {moved}, emigrated {emigrated}, stayed {stayed} of {pops_to_move}"
-        )
+        EVENT_BUS.emit(MigrationSummary(self.name, moved, emigrated, stayed, pops_to_move))
 
         return leaving_ships, random_ships
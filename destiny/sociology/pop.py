@@ -1,9 +1,11 @@
 import math
-from collections import Counter
+from collections import Counter, defaultdict
+from itertools import chain
 from random import Random
 from typing import List, Tuple, Type
-from uuid import uuid4
+from uuid import UUID
 
+from destiny.rng import random_uuid
 from destiny.sociology.government import (
     Government,
     HereditaryDictatorship,
@@ -15,10 +17,39 @@ from destiny.sociology.government import (
     DirectDemocracy,
     DirectConsensus,
 )
+from destiny.sociology.utils.cohorts import Cohorts
 
 
 class Population:
+    __slots__ = (
+        "rng",
+        "uuid",
+        "starting_population",
+        "average_age",
+        "descendents",
+        "average_descendent_age",
+        "generation",
+        "ancestry",
+        "children",
+        "_happiness",
+        "preferred_population_size",
+        "mergeable",
+        "stationary_migrant",
+        "autocratic_democratic",
+        "conservative_progressive",
+        "pacifist_militaristic",
+        "secular_religious",
+        "settler_colonial",
+        "traditionalist_technological",
+        "tolerance",
+        "natural_settler_colonial",
+        "natural_stationary_migrant",
+        "natural_tolerance",
+        "descendent_pops",
+    )
+
     rng: Random
+    uuid: UUID
 
     starting_population: int
     average_age: float
@@ -26,7 +57,7 @@ class Population:
     average_descendent_age: float
     generation: int
     ancestry: List[Tuple[str, int]]
-    children: List[int]
+    children: Cohorts
     _happiness: float
     preferred_population_size: int
     mergeable: bool
@@ -92,7 +123,7 @@ class Population:
         randomise_statistics: bool = False,
     ):
         self.rng = rng
-        self.uuid = uuid4()
+        self.uuid = random_uuid(rng)
         self.generation = 0
         self._happiness = 1.0
         self.mergeable = True
@@ -104,7 +135,7 @@ class Population:
         self.average_descendent_age = 0
 
         self.ancestry = ancestry
-        self.children = [0] * 20
+        self.children = Cohorts()
 
         self.descendent_pops = []
 
@@ -163,10 +194,7 @@ class Population:
             self.descendents * (1 - descendent_old_age_likelihood)
         )
 
-        new_adults = 0
-        if len(self.children) >= 20:
-            while len(self.children) >= 20:
-                new_adults += self.children.pop()
+        new_adults = self.children.advance()
         if self.descendents + new_adults > 0:
             self.average_descendent_age = (
                 self.descendents * self.average_descendent_age + new_adults * 20
@@ -182,7 +210,7 @@ class Population:
         ) + (self.descendents if self.average_descendent_age < 50 else 0)
         births = math.floor(childbearing_population / 1000 * birth_rate_per_thousand)
 
-        self.children = [births] + self.children
+        self.children[0] = births
 
         return self.descendents
 
@@ -263,49 +291,56 @@ class Population:
 
     @classmethod
     def merge_small_pops(cls, pops: List["Population"]) -> List["Population"]:
-        new_pops = []
-        remaining_pops = pops
+        """
+        Merges small pops sharing a primary ancestry, working from the end of the list. The first mergeable pop reached
+        of each ancestry takes in every remaining pop of that ancestry, mergeable or not; pops reached before then, and
+        pops with no others to merge with, are kept as they are.
+        """
+        by_ancestry = defaultdict(list)
+        for pop in pops:
+            by_ancestry[pop.ancestry[0][0]].append(pop)
 
-        while remaining_pops:
-            candidate = remaining_pops.pop()
-            if not candidate.mergeable:
-                new_pops.append(candidate)
+        new_pops = []
+        for candidate in reversed(pops):
+            remaining_pops = by_ancestry[candidate.ancestry[0][0]]
+            if not remaining_pops:
+                # already merged into a pop later in the list
                 continue
-            mergeable = []
-            for pop in remaining_pops:
-                if pop.ancestry[0][0] == candidate.ancestry[0][0]:
-                    mergeable.append(pop)
-            if not mergeable:
+            # the candidate is always the last of its ancestry still remaining
+            remaining_pops.pop()
+            if not candidate.mergeable or not remaining_pops:
                 new_pops.append(candidate)
                 continue
 
+            mergeable = remaining_pops.copy()
+            remaining_pops.clear()
+            mergeable.append(candidate)
+
+            starting_population = 0
+            people_years = 0
+            descendents = 0
+            descendent_years = 0
             for pop in mergeable:
-                remaining_pops.remove(pop)
+                starting_population += pop.starting_population
+                people_years += pop.starting_population * pop.average_age
+                descendents += pop.descendents
+                descendent_years += pop.descendents * pop.average_descendent_age
 
-            mergeable.append(candidate)
             merged_pop = Population(
                 candidate.rng,
-                sum(p.starting_population for p in mergeable),
+                starting_population,
                 [(candidate.ancestry[0][0], 100)],
             )
             if merged_pop.population == 0:
                 continue
-            merged_pop.average_age = (
-                sum(p.starting_population * p.average_age for p in mergeable)
-                / merged_pop.population
-            )
-            merged_pop.descendents = sum(p.descendents for p in mergeable)
+            merged_pop.average_age = people_years / merged_pop.population
+            merged_pop.descendents = descendents
             if merged_pop.descendents > 0:
-                merged_pop.average_descendent_age = (
-                    sum(p.descendents * p.average_descendent_age for p in mergeable)
-                    / merged_pop.descendents
-                )
-            merged_pop.children = [
-                sum(c) for c in zip(*[p.children for p in mergeable])
-            ]
+                merged_pop.average_descendent_age = descendent_years / merged_pop.descendents
+            merged_pop.children = Cohorts.sum([p.children for p in mergeable])
             merged_pop.inherit_statistics(mergeable, 0)
             merged_pop.descendent_pops = list(
-                set(sum((p.descendent_pops for p in mergeable), start=[]))
+                dict.fromkeys(chain.from_iterable(p.descendent_pops for p in mergeable))
             )
 
             new_pops.append(merged_pop)
@@ -316,17 +351,14 @@ class Population:
     def form_next_generation(cls, pops: List["Population"]) -> "Population":
         new_population = 0
         people_years = 0
-        new_children = [0] * 20
+        new_children = Cohorts()
         ancestries = Counter()
         for pop in pops:
             percent = pop.descendents / pop.population
             new_population += pop.descendents
             people_years += pop.descendents * pop.average_descendent_age
             pop.descendents -= pop.descendents
-            for n in range(len(pop.children)):
-                children_to_move = math.floor(percent * pop.children[n])
-                new_children[n] += children_to_move
-                pop.children[n] -= children_to_move
+            new_children.add(pop.children.split(percent))
             for ancestry, weighting in pop.ancestry:
                 ancestries[ancestry] += weighting
         unnormalised_ancestries = ancestries.most_common(3)
@@ -54,13 +54,28 @@ class Wormholes(Technology):
         return f"a stable artificial wormhole that can span {self.range}ly and costs {self.cost}"
 
 
+# every node in the tech tree in order of creation, so that nodes can be pickled by reference
+SCIENCE_NODES: List["ScienceNode"] = []
+
+
+def science_node(index: int) -> "ScienceNode":
+    return SCIENCE_NODES[index]
+
+
 class ScienceNode:
     options: List["ScienceNode"]
     provides: Tuple[Technology]
+    index: int
 
     def __init__(self, *techs: Technology):
         self.provides = techs
         self.options = []
+        self.index = len(SCIENCE_NODES)
+        SCIENCE_NODES.append(self)
+
+    def __reduce__(self):
+        # discoveries are compared by identity, so unpickled nodes must be the nodes of this process's tech tree
+        return science_node, (self.index,)
 
     def leads_to(
         self, *techs: Technology, node: Optional["ScienceNode"] = None
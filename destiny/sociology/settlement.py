@@ -1,13 +1,32 @@
+import math
 from collections import Counter
 from random import Random
-from typing import List, Type, Tuple, Optional
-from uuid import UUID, uuid4
+from typing import Dict, List, Type, Tuple, Optional, TYPE_CHECKING
+from uuid import UUID
 
+import numpy as np
+
+from destiny.events import EVENT_BUS, Starvation
+from destiny.metrics import METRICS
+from destiny.rng import random_uuid
 from destiny.sociology.government import Government
 from destiny.sociology.pop import Population
+from destiny.sociology import constants
 from destiny.sociology.constants import POP_TARGET_SIZE
 from destiny.sociology.utils.life import process_births_and_deaths
 from destiny.sociology.utils.city_names import get_name
+from destiny.sociology.utils.opinions import opinion_matrix, opinions_of, suitability_mask
+
+if TYPE_CHECKING:
+    from destiny.sociology.inhabitedplanet import InhabitedPlanet
+
+
+def check_population_total(tracked: float, counted: float, description: str):
+    """
+    Raises if an incrementally maintained population total has drifted from a full recount
+    """
+    if not math.isclose(tracked, counted, rel_tol=1e-9):
+        raise AssertionError(f"{description} has a tracked population of {tracked} but counts {counted}")
 
 
 class Settlement:
@@ -18,13 +37,55 @@ class Settlement:
     name: str
     population_by_year: List[int]
     founding_year: int
+    planet: Optional["InhabitedPlanet"]
+    # the sum of the pops' populations, kept up to date as pops are born, die, arrive and leave
+    _population: float
+    # (year, government type, philosophy) for the founding government and every government that replaced it
+    government_history: List[Tuple[int, str, str]]
+
+    # the pops list and length the opinion arrays were built for, the pops' opinions and half their tolerances
+    _suitability_pops: Optional[Tuple[List[Population], int]]
+    _pop_opinions: Optional[np.ndarray]
+    _pop_boundaries: Optional[np.ndarray]
+    # each government's opinions and suitability mask, by government id
+    _suitability: Dict[int, Tuple[Government, Tuple[float, ...], np.ndarray]]
 
     def government_support(self) -> float:
         if self.pops:
-            return sum(1 for pop in self.pops if self.government.suitable_for(pop))/len(self.pops)
+            return int(np.count_nonzero(self.suitability())) / len(self.pops)
         else:
             return 0
 
+    def suitability(self, government: Optional[Government] = None) -> np.ndarray:
+        """
+        Government.suitable_for, by default for the settlement's government, for every pop as a mask over pops
+
+        Masks are cached for as long as the pops are the same list with the same length and the government holds the
+        same opinions, so the governance checks in a year share them. Pops' tolerances change outside governance, so
+        the cache is cleared around it with invalidate_suitability.
+        """
+        if government is None:
+            government = self.government
+        pops = self._suitability_pops
+        if pops is None or pops[0] is not self.pops or pops[1] != len(self.pops):
+            self._suitability_pops = (self.pops, len(self.pops))
+            self._pop_opinions = opinion_matrix(self.pops)
+            self._pop_boundaries = np.array([pop.tolerance for pop in self.pops], dtype=np.float64) / 2
+            self._suitability = {}
+
+        opinions = opinions_of(government)
+        cached = self._suitability.get(id(government))
+        if cached is None or cached[0] is not government or cached[1] != opinions:
+            mask = suitability_mask(government, self._pop_opinions, self._pop_boundaries)
+            cached = self._suitability[id(government)] = (government, opinions, mask)
+        return cached[2]
+
+    def invalidate_suitability(self):
+        self._suitability_pops = None
+        self._pop_opinions = None
+        self._pop_boundaries = None
+        self._suitability = {}
+
     def ancestries(self) -> List[List[str]]:
         counter = Counter()
         for pop in self.pops:
@@ -39,13 +100,17 @@ class Settlement:
         government_type: Type[Government],
         founding_year: int,
     ):
-        self.uuid = uuid4()
+        self.uuid = random_uuid(rng)
         self.rng = rng
+        self.name = name
         self.pops = pops
+        self.planet = None
+        self._population = sum(p.population for p in pops)
+        self.invalidate_suitability()
         self.government = government_type(self)
-        self.name = name
         self.population_by_year = []
         self.founding_year = founding_year
+        self.government_history = [(founding_year, self.government.name, self.government.philosophy)]
 
     @classmethod
     def for_pops(cls, rng: Random, pops: List[Population], name: Optional[str] = None, founding_year: int = 0):
@@ -64,10 +129,37 @@ class Settlement:
 
     @property
     def population(self):
-        return sum(p.population for p in self.pops)
+        if constants.CHECK_POPULATION_TOTALS:
+            check_population_total(self._population, sum(p.population for p in self.pops), self.name)
+        return self._population
+
+    def _set_population(self, population: float):
+        if self.planet is not None:
+            self.planet.adjust_population(population - self._population)
+        self._population = population
+
+    def recount_population(self):
+        """
+        Recounts the total from every pop, for when the pops' own populations have changed
+        """
+        self._set_population(sum(p.population for p in self.pops))
+
+    def add_pop(self, pop: Population):
+        self.pops.append(pop)
+        self._set_population(self._population + pop.population)
+
+    def bind_rng(self, rng: Random):
+        """
+        Draws every random number for the settlement and its pops from rng, so that settlements can be processed
+        independently of each other
+        """
+        self.rng = rng
+        for pop in self.pops:
+            pop.rng = rng
 
     def births_and_deaths(self, birth_rate_modifier: float):
         self.pops = process_births_and_deaths(self.pops, self.rng, birth_rate_modifier)
+        self.recount_population()
 
     def process_year(
         self, year: int, birth_rate_modifier: float, is_earth: bool
@@ -76,14 +168,20 @@ class Settlement:
         :param year: the current year
         :return: A list of unhappy pops, units of manufacturing, units of science
         """
-        self.births_and_deaths(birth_rate_modifier)
+        with METRICS.phase("births_and_deaths"):
+            self.births_and_deaths(birth_rate_modifier)
         self.population_by_year.append(self.population)
         if len(self.pops) == 0:
             return [], 0, 0, 0
 
-        new_government = self.government.govern(self, year)
+        with METRICS.phase("governance"):
+            self.invalidate_suitability()
+            new_government = self.government.govern(self, year)
+            self.invalidate_suitability()
         if new_government:
+            METRICS.count("government_changes")
             self.government = new_government
+            self.government_history.append((year, new_government.name, new_government.philosophy))
             for pop in self.pops:
                 pop.happiness += 0.5
 
@@ -120,14 +218,16 @@ class Settlement:
         effort = len(pops_to_stay) + (len(pops_to_move) // 4)
 
         if effort < agricultural_requirement:
-            print(f"{self.name} cannot grow enough food! Their population has starved!")
+            EVENT_BUS.emit(Starvation(self.name))
             for pop in self.pops:
                 pop.starve()
+            self.recount_population()
             effort = 0
         else:
             effort -= agricultural_requirement
 
         self.pops = pops_to_stay
+        self._set_population(self._population - sum(p.population for p in pops_to_move))
 
         if effort > 0:
             science_output = round(
@@ -2,8 +2,10 @@ import math
 from collections import Counter
 from random import Random
 from typing import Optional, TYPE_CHECKING, List, Tuple, Type
-from uuid import UUID, uuid4
+from uuid import UUID
 
+from destiny.events import EVENT_BUS, PlanetColonised, ShipDecommissioned
+from destiny.rng import random_uuid
 from destiny.sociology.constants import SPEED_OF_LIGHT, SECONDS_PER_YEAR, LIGHTYEAR_METRES
 from destiny.sociology.science import (
     Technology,
@@ -22,6 +24,28 @@ if TYPE_CHECKING:
 
 
 class Starship:
+    __slots__ = (
+        "sublight_acceleration",
+        "sublight_range",
+        "ftl_speed",
+        "ftl_range",
+        "capacity",
+        "science_level",
+        "discoveries",
+        "name",
+        "founded",
+        "lifespan",
+        "decommissioned",
+        "origin",
+        "destination",
+        "destination_inhabited_planet",
+        "subjective_time_remaining",
+        "objective_time_remaining",
+        "cargo",
+        "rng",
+        "uuid",
+    )
+
     sublight_acceleration: float
     sublight_range: float
     ftl_speed: Optional[float]
@@ -59,7 +83,7 @@ class Starship:
         ftl_speed: Optional[float] = None,
         ftl_range: Optional[float] = None,
     ):
-        self.uuid = uuid4()
+        self.uuid = random_uuid(rng)
 
         self.sublight_acceleration = sublight_acceleration
         self.sublight_range = sublight_range
@@ -78,6 +102,7 @@ class Starship:
         self.destination_inhabited_planet = None
         self.subjective_time_remaining = None
         self.objective_time_remaining = None
+        self.cargo = []
 
         self.rng = rng
 
@@ -118,6 +143,14 @@ class Starship:
             current_location.planet, self.destination
         )
 
+    def bind_rng(self, rng: Random):
+        """
+        Draws every random number for the ship and its cargo from rng
+        """
+        self.rng = rng
+        for pop in self.cargo:
+            pop.rng = rng
+
     def transit(self) -> bool:
         """
         :return: True if the ship has reached its destination
@@ -233,7 +266,7 @@ class Starship:
         if self.founded + self.lifespan > year:
             self.destination.ships.append(self)
         else:
-            print(f"{self.name} has reached the end of its service life")
+            EVENT_BUS.emit(ShipDecommissioned(self.name))
         self.reset()
         return new_planet
 
@@ -249,7 +282,7 @@ class Starship:
         name = get_name(origin_country, self.rng)
 
         planet = InhabitedPlanetConstructor(
-            self.rng, self.destination, name, year
+            self.rng, self.destination, name, year, registry=self.origin.registry
         )
         planet.science_level = self.science_level
         planet.discoveries = list(self.discoveries)
@@ -257,7 +290,8 @@ class Starship:
             pop.happiness = 1
             pop.reset_wonderlust()
         settlement = Settlement.for_pops(self.rng, self.cargo, name, founding_year=year)
-        planet.settlements.append(settlement)
+        planet.add_settlement(settlement)
+        EVENT_BUS.emit(PlanetColonised(year, name, self.destination.star.name, self.name, len(self.cargo)))
         return planet
 
     def reset(self):
@@ -269,10 +303,10 @@ class Starship:
         for pop in self.cargo:
             for settlement in self.destination_inhabited_planet.settlements:
                 if settlement.government.suitable_for(pop):
-                    settlement.pops.append(pop)
+                    settlement.add_pop(pop)
                     pop.happiness = 1
                     break
             else:
                 pop.happiness = 0.75
-                self.rng.choice(self.destination_inhabited_planet.settlements).pops.append(pop)
+                self.rng.choice(self.destination_inhabited_planet.settlements).add_pop(pop)
             pop.reset_wonderlust()
@@ -0,0 +1,102 @@
+import math
+from array import array
+from typing import Iterable, Iterator, List
+
+CHILDHOOD_YEARS = 20
+
+
+class Cohorts:
+    """
+    Fixed-size count of children by age, youngest first
+
+    Backed by a flat array with a rotating head so that ageing every cohort by a year is O(1) and never allocates.
+    """
+
+    __slots__ = ("counts", "head")
+
+    counts: array
+    head: int
+
+    def __init__(self, counts: Iterable[int] = ()):
+        self.counts = array("q", counts)
+        if not self.counts:
+            self.counts = array("q", bytes(8 * CHILDHOOD_YEARS))
+        if len(self.counts) != CHILDHOOD_YEARS:
+            raise ValueError(f"Expected {CHILDHOOD_YEARS} cohorts, got {len(self.counts)}")
+        self.head = 0
+
+    @classmethod
+    def from_ring(cls, buffer: bytes, head: int) -> "Cohorts":
+        """
+        Builds cohorts directly from the raw bytes of a ring buffer whose youngest cohort is at index head
+        """
+        cohorts = cls.__new__(cls)
+        cohorts.counts = array("q")
+        cohorts.counts.frombytes(buffer)
+        cohorts.head = head
+        return cohorts
+
+    def __len__(self):
+        return CHILDHOOD_YEARS
+
+    def __getitem__(self, age: int) -> int:
+        return self.counts[(self.head + age) % CHILDHOOD_YEARS]
+
+    def __setitem__(self, age: int, count: int):
+        self.counts[(self.head + age) % CHILDHOOD_YEARS] = count
+
+    def __iter__(self) -> Iterator[int]:
+        head = self.head
+        counts = self.counts
+        yield from counts[head:]
+        yield from counts[:head]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"Cohorts({list(self)})"
+
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def advance(self) -> int:
+        """
+        Ages every cohort by a year, leaving an empty youngest cohort
+
+        :returns the number of children who have come of age
+        """
+        self.head = (self.head - 1) % CHILDHOOD_YEARS
+        new_adults = self.counts[self.head]
+        self.counts[self.head] = 0
+        return new_adults
+
+    def split(self, fraction: float) -> "Cohorts":
+        """
+        Moves the given fraction of each cohort, rounded down, into a new set of cohorts
+        """
+        moved = array("q", bytes(8 * CHILDHOOD_YEARS))
+        counts = self.counts
+        head = self.head
+        for age in range(CHILDHOOD_YEARS):
+            index = (head + age) % CHILDHOOD_YEARS
+            children_to_move = math.floor(fraction * counts[index])
+            moved[age] = children_to_move
+            counts[index] -= children_to_move
+        cohorts = Cohorts.__new__(Cohorts)
+        cohorts.counts = moved
+        cohorts.head = 0
+        return cohorts
+
+    def add(self, other: "Cohorts"):
+        counts = self.counts
+        head = self.head
+        for age, count in enumerate(other):
+            counts[(head + age) % CHILDHOOD_YEARS] += count
+
+    @classmethod
+    def sum(cls, all_cohorts: List["Cohorts"]) -> "Cohorts":
+        total = cls()
+        for cohorts in all_cohorts:
+            total.add(cohorts)
+        return total
@@ -0,0 +1,75 @@
+from typing import List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from destiny.sociology.utils.opinions import l1_distances, opinion_hashes, opinion_matrix
+
+if TYPE_CHECKING:
+    from destiny.sociology.pop import Population
+
+
+def nearest_choices(distances: np.ndarray, k: int) -> np.ndarray:
+    """
+    :returns a mask of each row's k smallest distances, breaking ties in favour of the earliest column as a stable sort
+        would
+    """
+    if k >= distances.shape[1]:
+        return np.ones(distances.shape, dtype=bool)
+    kth_indexes = np.argpartition(distances, k - 1, axis=1)[:, k - 1 : k]
+    kth = np.take_along_axis(distances, kth_indexes, axis=1)
+    closer = distances < kth
+    tied = distances == kth
+    places_left = k - closer.sum(axis=1, keepdims=True)
+    return closer | (tied & (np.cumsum(tied, axis=1) <= places_left))
+
+
+def tally_votes(
+    voters: List["Population"], candidates: List["Population"], council_size: int
+) -> List[Tuple["Population", int]]:
+    """
+    Every voter votes for the council_size candidates most similar to it, choosing only between the candidates that
+    share its opinion hash if there are enough of them
+
+    Distances for every voter with the same opinion hash are computed as one matrix. The results are exactly those of
+    ranking each voter's choices with a stable sort on Population.similarity_to and counting the votes in a Counter,
+    including which candidates win ties.
+
+    :returns the council_size candidates with the most votes and their votes, as Counter.most_common would
+    """
+    if not voters or not candidates:
+        return []
+
+    voter_opinions = opinion_matrix(voters)
+    candidate_opinions = opinion_matrix(candidates)
+    voter_hashes = opinion_hashes(voter_opinions)
+    candidate_hashes = opinion_hashes(candidate_opinions)
+
+    num_voters = len(voters)
+    num_candidates = len(candidates)
+    votes = np.zeros(num_candidates, dtype=np.int64)
+    # where each candidate was first voted for, which is the order a Counter would hold them in
+    first_voter = np.full(num_candidates, num_voters, dtype=np.int64)
+    first_distance = np.zeros(num_candidates, dtype=np.float64)
+
+    for opinion in np.unique(voter_hashes):
+        voter_indexes = np.flatnonzero(voter_hashes == opinion)
+        choice_indexes = np.flatnonzero(candidate_hashes == opinion)
+        if len(choice_indexes) < council_size:
+            choice_indexes = np.arange(num_candidates)
+
+        distances = l1_distances(voter_opinions[voter_indexes], candidate_opinions[choice_indexes])
+        ballots = nearest_choices(distances, council_size)
+        votes[choice_indexes] += ballots.sum(axis=0)
+
+        first_rows = ballots.argmax(axis=0)
+        group_first_voter = np.where(
+            ballots.any(axis=0), voter_indexes[first_rows], num_voters
+        )
+        earlier = np.flatnonzero(group_first_voter < first_voter[choice_indexes])
+        first_voter[choice_indexes[earlier]] = group_first_voter[earlier]
+        first_distance[choice_indexes[earlier]] = distances[first_rows[earlier], earlier]
+
+    voted = np.flatnonzero(votes)
+    counter_order = voted[np.lexsort((voted, first_distance[voted], first_voter[voted]))]
+    winners = counter_order[np.argsort(-votes[counter_order], kind="stable")][:council_size]
+    return [(candidates[index], int(votes[index])) for index in winners.tolist()]
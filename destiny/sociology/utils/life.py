@@ -1,30 +1,29 @@
+from destiny.sociology import constants
 from destiny.sociology.constants import POP_TARGET_SIZE
 from destiny.sociology.pop import Population
+from destiny.sociology.utils.population_store import PopulationStore
 
 
-def process_births_and_deaths(pops, rng, birth_rate_modifier=1):
-    for n, pop in enumerate(pops):
-        pop.births_and_deaths(rng.randint(10, 80)*birth_rate_modifier, rng.randint(1, 10))
+def process_births_and_deaths(pops, rng, birth_rate_modifier=1, vectorised=None):
+    if vectorised is None:
+        vectorised = constants.VECTORISED_BIRTHS_AND_DEATHS
+    if vectorised and pops:
+        store = PopulationStore(pops)
+        store.births_and_deaths(rng, birth_rate_modifier)
+        store.write_back()
+    else:
+        for n, pop in enumerate(pops):
+            pop.births_and_deaths(rng.randint(10, 80)*birth_rate_modifier, rng.randint(1, 10))
     pops_with_descendents = [p for p in pops if p.descendents > 0]
-    pops_with_descendents = rng.sample(
-        pops_with_descendents, len(pops_with_descendents)
-    )
-    while pops_with_descendents:
-        parent_pops = []
-        while (
-            sum(p.descendents for p in parent_pops) < POP_TARGET_SIZE
-            and pops_with_descendents
-        ):
-            parent_pops.append(pops_with_descendents.pop())
+    pops.extend(form_next_generations(rng.sample(pops_with_descendents, len(pops_with_descendents))))
 
-        if sum(p.descendents for p in parent_pops) >= POP_TARGET_SIZE:
-            pops.append(Population.form_next_generation(parent_pops))
     pops_with_no_starting_population = []
     pops_with_few_starting_population = []
     new_pops = []
+    few_starting_population = POP_TARGET_SIZE / 20
     for pop in pops:
         if pop.population > 0:
-            if pop.starting_population < POP_TARGET_SIZE / 20:
+            if pop.starting_population < few_starting_population:
                 pops_with_few_starting_population.append(pop)
             elif pop.starting_population <= 0:
                 pops_with_no_starting_population.append(pop)
@@ -37,3 +36,21 @@ def process_births_and_deaths(pops, rng, birth_rate_modifier=1):
     if pops_with_few_starting_population:
         new_pops += Population.merge_small_pops(pops_with_few_starting_population)
     return new_pops
+
+
+def form_next_generations(parent_pops):
+    """
+    Groups parents, from the end of the list, until their descendents make up a full pop, and forms each group's
+    descendents into a new pop. Parents left over without enough descendents between them keep their descendents.
+    """
+    new_pops = []
+    group = []
+    descendents = 0
+    for pop in reversed(parent_pops):
+        group.append(pop)
+        descendents += pop.descendents
+        if descendents >= POP_TARGET_SIZE:
+            new_pops.append(Population.form_next_generation(group))
+            group = []
+            descendents = 0
+    return new_pops
@@ -1,14 +1,20 @@
 from random import Random
+from typing import Optional
 
 from destiny.cartography.planet import Planet
-from destiny.sociology.constants import POP_TARGET_SIZE
+from destiny.sociology.constants import EARTH_POPULATION_MULTIPLIER, POP_TARGET_SIZE
+from destiny.sociology.colonisation import ColonisationRegistry
 from destiny.sociology.inhabitedplanet import InhabitedPlanet
 from destiny.sociology.pop import Population
 from destiny.sociology.settlement import Settlement
+from destiny.sociology.utils.cohorts import Cohorts
 
 
 def generate_earth_pops(
-    rng: Random, population_multiplier: float = 10.0 / 8, earth: Planet = None
+    rng: Random,
+    population_multiplier: float = EARTH_POPULATION_MULTIPLIER,
+    earth: Planet = None,
+    registry: Optional[ColonisationRegistry] = None,
 ) -> InhabitedPlanet:
     earth_pop_countries = []
     with open("data/worldpop.csv", encoding='utf-8-sig') as earth_pop_text:
@@ -16,7 +22,7 @@ def generate_earth_pops(
             country, pop_str = line.split(",")
             earth_pop_countries.append((country, int(pop_str)))
 
-    planet = InhabitedPlanet(rng, earth, "Earth", 0)
+    planet = InhabitedPlanet(rng, earth, "Earth", 0, registry=registry)
     print("Loading earth data")
     for country, population in earth_pop_countries:
         print(f"Loading {country}")
@@ -37,18 +43,18 @@ def generate_earth_pops(
                 population.average_age = rng.randint(25, 65)
             else:
                 population.average_age = rng.randint(66, 90)
-            population.children = [
+            population.children = Cohorts(
                 rng.randint(
                     int(50 / 10_000 * POP_TARGET_SIZE),
                     int(300 / 10_000 * POP_TARGET_SIZE),
                 )
                 for _ in range(20)
-            ]
+            )
             pops.append(population)
         if len(pops) == 0:
             continue
         settlement = Settlement.for_pops(rng, pops, country)
-        planet.settlements.append(settlement)
+        planet.add_settlement(settlement)
 
     planet.is_earth = True
     return planet
@@ -0,0 +1,107 @@
+from itertools import chain
+from operator import attrgetter
+from typing import List, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+if TYPE_CHECKING:
+    from destiny.sociology.government import Government
+    from destiny.sociology.pop import Population
+
+# every opinion a pop holds, in the order Population.similarity_to sums them
+OPINION_AXES = (
+    "autocratic_democratic",
+    "conservative_progressive",
+    "pacifist_militaristic",
+    "secular_religious",
+    "traditionalist_technological",
+)
+
+_get_opinions = attrgetter(*OPINION_AXES)
+
+
+def opinions_of(pop_or_government: object) -> Tuple[float, ...]:
+    return _get_opinions(pop_or_government)
+
+
+def opinion_matrix(pops: Sequence[object]) -> np.ndarray:
+    """
+    :returns a pops x OPINION_AXES matrix of the pops', or governments', opinions
+    """
+    return np.fromiter(
+        chain.from_iterable(map(_get_opinions, pops)),
+        dtype=np.float64,
+        count=len(pops) * len(OPINION_AXES),
+    ).reshape(len(pops), len(OPINION_AXES))
+
+
+def suitability_mask(
+    government: "Government", pop_opinions: np.ndarray, pop_boundaries: np.ndarray
+) -> np.ndarray:
+    """
+    :param pop_boundaries: half of each pop's tolerance
+    :returns Government.suitable_for for every row of pop_opinions, making exactly the same comparisons
+    """
+    differences = np.abs(pop_opinions - np.array(_get_opinions(government), dtype=np.float64))
+    return np.all(differences < pop_boundaries[:, None], axis=1)
+
+
+def opinion_hashes(opinions: np.ndarray) -> np.ndarray:
+    """
+    :returns each row's Population.opinion_hash
+    """
+    # numpy and Python both round halves to even
+    bits = np.round(opinions).astype(np.int64)
+    hashes = np.zeros(len(opinions), dtype=np.int64)
+    for axis in range(len(OPINION_AXES)):
+        hashes += bits[:, axis] << axis
+    return hashes
+
+
+def l1_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    :returns the a x b matrix of Population.similarity_to between every row of a and every row of b, summed in the same
+        order so the results are bit for bit identical
+    """
+    distances = np.abs(a[:, 0, None] - b[None, :, 0])
+    for axis in range(1, len(OPINION_AXES)):
+        distances += np.abs(a[:, axis, None] - b[None, :, axis])
+    distances /= len(OPINION_AXES)
+    return distances
+
+
+class GovernmentIndex:
+    """
+    KD-tree over the opinions of a group of governments, for finding every government suitable_for each of a batch of
+    pops in one query
+
+    A government is suitable for a pop when it is within half the pop's tolerance on every axis, which is a ball in the
+    Chebyshev metric. The tree finds the governments within each pop's ball, then they are filtered with exactly the
+    comparisons Government.suitable_for makes, so the results are the same even at the boundary.
+    """
+
+    governments: List["Government"]
+    opinions: np.ndarray
+    tree: cKDTree
+
+    def __init__(self, governments: List["Government"]):
+        self.governments = governments
+        self.opinions = opinion_matrix(governments)
+        self.tree = cKDTree(self.opinions)
+
+    def suitable_for(self, pops: List["Population"]) -> List[np.ndarray]:
+        """
+        :returns the indexes of the governments suitable for each pop, in ascending order
+        """
+        if not pops or not self.governments:
+            return [np.zeros(0, dtype=np.int64) for _ in pops]
+        pop_opinions = opinion_matrix(pops)
+        boundaries = np.array([pop.tolerance for pop in pops], dtype=np.float64) / 2
+        matches = self.tree.query_ball_point(pop_opinions, boundaries, p=np.inf)
+        suitable = []
+        for pop_opinion, boundary, nearby in zip(pop_opinions, boundaries, matches):
+            nearby = np.array(sorted(nearby), dtype=np.int64)
+            within = np.all(np.abs(self.opinions[nearby] - pop_opinion) < boundary, axis=1)
+            suitable.append(nearby[within])
+        return suitable
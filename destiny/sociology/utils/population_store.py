@@ -0,0 +1,161 @@
+from itertools import chain
+from random import Random
+from typing import List
+
+import numpy as np
+
+from destiny.sociology.pop import Population
+from destiny.sociology.utils.cohorts import Cohorts, CHILDHOOD_YEARS
+
+
+class PopulationStore:
+    """
+    Structure-of-arrays view of a group of pops, used to run a year of births, deaths and ageing in a handful of
+    vectorised operations instead of one Population.births_and_deaths call per pop.
+
+    Children are held as a ring buffer with one column per year of childhood. Every pop ages at the same time, so the
+    whole store shares a single head index pointing at the youngest cohort.
+    """
+
+    pops: List[Population]
+    starting_population: np.ndarray
+    descendents: np.ndarray
+    average_age: np.ndarray
+    average_descendent_age: np.ndarray
+    children: np.ndarray
+    head: int
+
+    def __init__(self, pops: List[Population]):
+        self.pops = pops
+        self.starting_population = np.fromiter(
+            (p.starting_population for p in pops), dtype=np.float64, count=len(pops)
+        )
+        self.descendents = np.fromiter(
+            (p.descendents for p in pops), dtype=np.float64, count=len(pops)
+        )
+        self.average_age = np.fromiter(
+            (p.average_age for p in pops), dtype=np.float64, count=len(pops)
+        )
+        self.average_descendent_age = np.fromiter(
+            (p.average_descendent_age for p in pops), dtype=np.float64, count=len(pops)
+        )
+        self.children = np.fromiter(
+            chain.from_iterable(p.children for p in pops),
+            dtype=np.int64,
+            count=len(pops) * CHILDHOOD_YEARS,
+        ).reshape(len(pops), CHILDHOOD_YEARS)
+        self.head = 0
+
+    def __len__(self):
+        return len(self.pops)
+
+    @property
+    def population(self) -> np.ndarray:
+        return self.starting_population + self.descendents
+
+    def draw_rates(self, rng: Random, birth_rate_modifier: float, statistical: bool):
+        """
+        :param statistical: draw every rate in bulk from a numpy generator seeded from rng rather than replaying the
+            per-pop draws of the object path, which keeps rng's stream in step with process_births_and_deaths
+        :returns birth rates, accidental death rates and the two old age jitters for every pop
+        """
+        if statistical:
+            generator = np.random.default_rng(rng.getrandbits(64))
+            birth_rates = generator.integers(10, 80, len(self), endpoint=True)
+            death_rates = generator.integers(1, 10, len(self), endpoint=True)
+            jitter = generator.uniform(-0.1, 0.1, (2, len(self)))
+            return birth_rates * birth_rate_modifier, death_rates, jitter[0], jitter[1]
+
+        birth_rates = np.empty(len(self), dtype=np.float64)
+        death_rates = np.empty(len(self), dtype=np.float64)
+        jitter = np.empty((2, len(self)), dtype=np.float64)
+        for n, pop in enumerate(self.pops):
+            birth_rates[n] = rng.randint(10, 80) * birth_rate_modifier
+            death_rates[n] = rng.randint(1, 10)
+            jitter[0, n] = pop.rng.uniform(-0.1, 0.1)
+            jitter[1, n] = pop.rng.uniform(-0.1, 0.1)
+        return birth_rates, death_rates, jitter[0], jitter[1]
+
+    def births_and_deaths(
+        self, rng: Random, birth_rate_modifier: float = 1, statistical: bool = True
+    ):
+        """
+        Applies one year of Population.births_and_deaths to every pop in the store
+        """
+        (
+            birth_rates,
+            death_rates,
+            starting_jitter,
+            descendent_jitter,
+        ) = self.draw_rates(rng, birth_rate_modifier, statistical)
+
+        population = self.population
+        accidental_deaths = np.floor(population / 1000 * death_rates)
+        death_ratio = np.divide(
+            self.descendents,
+            population,
+            out=np.zeros_like(population),
+            where=population != 0,
+        )
+        self.descendents -= np.floor(accidental_deaths * death_ratio)
+        self.starting_population -= np.ceil(accidental_deaths * (1 - death_ratio))
+
+        starting_old_age_likelihood = (
+            np.clip((self.average_age - 25) / 100 + starting_jitter, 0, 1) ** 3
+        )
+        descendent_old_age_likelihood = (
+            np.clip(
+                (self.average_descendent_age - 25) / 100 + descendent_jitter, 0, 1
+            )
+            ** 3
+        )
+        self.starting_population = np.floor(
+            self.starting_population * (1 - starting_old_age_likelihood)
+        )
+        self.descendents = np.floor(
+            self.descendents * (1 - descendent_old_age_likelihood)
+        )
+
+        self.head = (self.head - 1) % CHILDHOOD_YEARS
+        new_adults = self.children[:, self.head].astype(np.float64)
+        adults = self.descendents + new_adults
+        self.average_descendent_age = np.divide(
+            self.descendents * self.average_descendent_age + new_adults * 20,
+            adults,
+            out=np.zeros_like(adults),
+            where=adults > 0,
+        )
+        self.descendents = adults
+
+        self.average_age += 1
+
+        childbearing_population = np.where(
+            self.average_age < 50, self.starting_population, 0
+        ) + np.where(self.average_descendent_age < 50, self.descendents, 0)
+        self.children[:, self.head] = np.floor(
+            childbearing_population / 1000 * birth_rates
+        )
+
+    def write_back(self):
+        row_bytes = 8 * CHILDHOOD_YEARS
+        buffer = self.children.tobytes()
+        for (
+            n,
+            pop,
+            starting_population,
+            descendents,
+            average_age,
+            average_descendent_age,
+        ) in zip(
+            range(0, len(buffer), row_bytes),
+            self.pops,
+            self.starting_population.astype(np.int64).tolist(),
+            self.descendents.astype(np.int64).tolist(),
+            self.average_age.tolist(),
+            self.average_descendent_age.tolist(),
+        ):
+            pop.starting_population = starting_population
+            pop.descendents = descendents
+            pop.average_age = average_age
+            pop.average_descendent_age = average_descendent_age
+            pop.children = Cohorts.from_ring(buffer[n : n + row_bytes], self.head)
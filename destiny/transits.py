@@ -0,0 +1,180 @@
+import os
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from uuid import UUID
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from destiny.cartography.planet import Planet
+
+# number of transits held in memory before they are appended to the spill file, if there is one
+SPILL_EVERY = 1_000_000
+
+
+class TransitLog:
+    """
+    Compact columnar record of every ship journey
+
+    Planets are interned to small integer ids so each transit costs two int32s, and years are stored as offsets into
+    the transit columns rather than per transit. Given a spill path, transits are periodically appended to that file
+    and read back a chunk at a time when the log is aggregated, so the history held in memory stays bounded.
+
+    Routes are numbered in the order they are first travelled. Aggregating the log counts transits per route and year
+    with numpy rather than a dict lookup per transit, and only keeps the counts of routes in years they were travelled,
+    as most routes are only travelled in a few years.
+    """
+
+    planets: List[UUID]
+    planet_ids: Dict[UUID, int]
+    transits: array
+    year_starts: array
+    spill_path: Optional[str]
+    spilled: int
+
+    def __init__(self, spill_path: Optional[str] = None):
+        self.planets = []
+        self.planet_ids = {}
+        # start and end planet ids, interleaved
+        self.transits = array("i")
+        self.year_starts = array("q")
+        self.spill_path = spill_path
+        self.spilled = 0
+        if spill_path:
+            open(spill_path, "wb").close()
+
+    def __len__(self):
+        return self.spilled + len(self.transits) // 2
+
+    @property
+    def num_years(self) -> int:
+        return len(self.year_starts)
+
+    def new_year(self):
+        """
+        Starts a new year; every following transit is recorded against it
+        """
+        self.year_starts.append(len(self))
+
+    def _planet_id(self, planet: "Planet") -> int:
+        planet_id = self.planet_ids.get(planet.uuid)
+        if planet_id is None:
+            planet_id = len(self.planets)
+            self.planet_ids[planet.uuid] = planet_id
+            self.planets.append(planet.uuid)
+        return planet_id
+
+    def record(self, start: "Planet", end: "Planet"):
+        self.transits.append(self._planet_id(start))
+        self.transits.append(self._planet_id(end))
+        if self.spill_path and len(self.transits) >= 2 * SPILL_EVERY:
+            self.spill()
+
+    def spill(self):
+        with open(self.spill_path, "ab") as spill_file:
+            self.transits.tofile(spill_file)
+        self.spilled += len(self.transits) // 2
+        self.transits = array("i")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.spilled:
+            # the spill file keeps growing after a checkpoint, so the checkpoint needs its own copy of the spilled
+            # transits
+            with open(self.spill_path, "rb") as spill_file:
+                state["spilled_transits"] = spill_file.read(self.spilled * 2 * 4)
+        return state
+
+    def __setstate__(self, state):
+        spilled_transits = state.pop("spilled_transits", None)
+        self.__dict__.update(state)
+        if self.spill_path:
+            with open(self.spill_path, "wb") as spill_file:
+                if spilled_transits:
+                    spill_file.write(spilled_transits)
+
+    def _chunks(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        :returns the transits in chunks of at most SPILL_EVERY, each with the index of its first transit, reading the
+            spilled transits back from the spill file a chunk at a time
+        """
+        if self.spilled:
+            spilled = np.memmap(self.spill_path, dtype=np.int32, mode="r", shape=(self.spilled, 2))
+            for offset in range(0, self.spilled, SPILL_EVERY):
+                yield offset, np.asarray(spilled[offset:offset + SPILL_EVERY])
+        in_memory = np.frombuffer(self.transits, dtype=np.int32).reshape(-1, 2)
+        for offset in range(0, len(in_memory), SPILL_EVERY):
+            yield self.spilled + offset, in_memory[offset:offset + SPILL_EVERY]
+
+    def transits_per_year(self) -> np.ndarray:
+        year_starts = np.frombuffer(self.year_starts, dtype=np.int64)
+        return np.diff(year_starts, append=len(self))
+
+    def route_counts(self) -> Tuple[List[Tuple[UUID, UUID]], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :returns every route as a (start uuid, end uuid) pair in the order it was first travelled, the start and end of
+            each route's entries in the years and counts, and the years each route was travelled in, in order, with the
+            number of transits along it in each of those years
+        """
+        num_planets = max(len(self.planets), 1)
+        num_years = max(self.num_years, 1)
+        year_starts = np.frombuffer(self.year_starts, dtype=np.int64)
+
+        # per chunk, the transits along each route in each year, keyed by route then year, and every route in the order
+        # it was first travelled
+        chunk_route_years = [np.empty(0, dtype=np.int64)]
+        chunk_counts = [np.empty(0, dtype=np.int64)]
+        chunk_keys = [np.empty(0, dtype=np.int64)]
+        for offset, columns in self._chunks():
+            keys = columns[:, 0].astype(np.int64) * num_planets + columns[:, 1]
+            years = np.searchsorted(year_starts, np.arange(offset, offset + len(keys)), side="right") - 1
+            # fits in an int64 for any realistic number of planets and years
+            route_years, counts = np.unique(keys * num_years + years, return_counts=True)
+            chunk_route_years.append(route_years)
+            chunk_counts.append(counts)
+            unique_keys, first_seen = np.unique(keys, return_index=True)
+            chunk_keys.append(unique_keys[np.argsort(first_seen, kind="stable")])
+
+        # each chunk is already sorted, so this only has to merge them and add up routes travelled across chunks
+        route_years = np.concatenate(chunk_route_years)
+        del chunk_route_years
+        order = np.argsort(route_years, kind="stable")
+        route_years = route_years[order]
+        counts = np.concatenate(chunk_counts)[order]
+        del chunk_counts, order
+        firsts = np.flatnonzero(np.diff(route_years, prepend=-1))
+        counts = np.add.reduceat(counts, firsts) if len(firsts) else counts
+        route_years = route_years[firsts]
+
+        route_keys, first_seen = np.unique(np.concatenate(chunk_keys), return_index=True)
+        order = np.argsort(first_seen, kind="stable")
+        bounds = np.searchsorted(route_years, np.append(route_keys, route_keys[-1:] + 1) * num_years)
+        spans = np.stack([bounds[:-1], bounds[1:]], axis=1)[order]
+
+        routes = [
+            (self.planets[key // num_planets], self.planets[key % num_planets])
+            for key in route_keys[order].tolist()
+        ]
+        return routes, spans, route_years % num_years, counts
+
+    def route_frequencies(self) -> Iterator[Tuple[UUID, UUID, np.ndarray]]:
+        """
+        Yields every route's start and end planet uuids, in the order it was first travelled, and the fraction of each
+        year's transits that travelled it, which is zero for years without any transits. Only a single route's
+        frequencies are ever expanded to a value per year.
+        """
+        routes, spans, years, counts = self.route_counts()
+        transits_per_year = self.transits_per_year()
+        for (start, end), (first, last) in zip(routes, spans.tolist()):
+            route_years = years[first:last]
+            frequencies = np.zeros(self.num_years, dtype=np.float64)
+            frequencies[route_years] = counts[first:last] / transits_per_year[route_years]
+            yield start, end, frequencies
+
+    def close(self):
+        """
+        Removes the spill file, if there is one
+        """
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+        self.spilled = 0
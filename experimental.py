@@ -1,10 +1,40 @@
-from destiny.simulation import simulate
+"""
+Runs the simulation and writes the resulting starmap to starmap.json
+
+    python experimental.py
+    python experimental.py --metrics metrics.csv
+"""
+import argparse
+import os
+
+from destiny.events import EVENT_BUS, Level, StdoutSink
+from destiny.metrics import METRICS
+from destiny.serialisation import Starmap
+from destiny.simulation import run
 
 
 def main():
-    result = simulate()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    # per-year timings and counts, written as CSV or JSON depending on the file's extension
+    parser.add_argument("--metrics", metavar="PATH", default=None)
+    args = parser.parse_args()
+
+    if args.metrics is not None:
+        extension = os.path.splitext(args.metrics)[1].lower()
+        if extension not in (".csv", ".json"):
+            parser.error(f"--metrics must be a .csv or .json file, not {args.metrics}")
+        METRICS.enable()
+
+    EVENT_BUS.add_sink(StdoutSink(Level.DEBUG))
+    starmap, transits = run()
+    print("Serialising data")
     with open("starmap.json", "w") as mapfile:
-        mapfile.write(result.model_dump_json())
+        Starmap.write_json(mapfile, starmap, transits)
+    if args.metrics is not None:
+        if extension == ".json":
+            METRICS.write_json(args.metrics)
+        else:
+            METRICS.write_csv(args.metrics)
     print("Done")
 
 